@@ -0,0 +1,117 @@
+"""
+Alias Matcher - Aho-Corasick automaton over plant name aliases
+
+Finds every alias in a query in one pass over its characters, however many
+plants are loaded. Matches must start and end on word boundaries and
+overlapping matches resolve leftmost-longest, so "ntpc_solar" beats "ntpc"
+and "ese" is not found inside "these".
+"""
+
+from collections import deque
+from typing import Dict, List, Tuple
+
+
+def _is_boundary(query: str, pos: int) -> bool:
+    """True if pos sits between a word character and a non-word character or the string edge"""
+    return pos <= 0 or pos >= len(query) or not query[pos - 1].isalnum() or not query[pos].isalnum()
+
+
+class AliasMatcher:
+    def __init__(self, aliases: Dict[str, str]):
+        # State 0 is the root; goto holds the trie edges, fail the suffix links
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # state -> (alias length, plant) for every alias ending at this state, longest first
+        self._out: List[List[Tuple[int, str]]] = [[]]
+
+        for alias, plant in aliases.items():
+            if alias:
+                self._insert(alias, plant)
+        self._build_links()
+        self.size = len(aliases)
+
+    def _insert(self, alias: str, plant: str):
+        state = 0
+        for ch in alias:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state] = [(len(alias), plant)]
+
+    def _build_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                # Parents are finished before children, so the fail state's outputs are complete
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+                queue.append(nxt)
+
+    def find(self, query: str) -> List[str]:
+        """Plants whose aliases occur as whole words in query, in order of first mention"""
+        goto, fail, out = self._goto, self._fail, self._out
+        matches = []
+        state = 0
+        for i, ch in enumerate(query):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state] and _is_boundary(query, i + 1):
+                for length, plant in out[state]:
+                    start = i - length + 1
+                    if _is_boundary(query, start):
+                        matches.append((start, -length, plant))
+
+        # Leftmost-longest: take matches by start, longest first, skipping overlaps
+        plants = []
+        covered = 0
+        for start, neg_length, plant in sorted(matches):
+            if start >= covered:
+                covered = start - neg_length
+                if plant not in plants:
+                    plants.append(plant)
+        return plants
+
+    def __len__(self):
+        return self.size
+
+
+if __name__ == '__main__':
+    # Benchmark: per-query cost against the number of plants
+    import timeit
+
+    def naive_find(aliases, query):
+        found = []
+        for alias, plant in aliases.items():
+            if alias in query and plant not in found:
+                found.append(plant)
+        return found
+
+    query = "compare plant_0420_solar vs plant_0007_wind energy generation for last week"
+    print(f"{'plants':>7} {'aliases':>8} {'build ms':>9} {'matcher us':>11} {'naive us':>9}")
+    for n_plants in (10, 100, 1000, 5000):
+        aliases = {}
+        for i in range(n_plants):
+            plant = f"Plant_{i:04d}_{'Solar' if i % 2 == 0 else 'Wind'}"
+            aliases[plant.lower()] = plant
+            aliases[plant.replace('_', '').lower()] = plant
+            aliases[f"p{i:04d}"] = plant
+
+        start = timeit.default_timer()
+        matcher = AliasMatcher(aliases)
+        build_ms = (timeit.default_timer() - start) * 1e3
+
+        runs = 2000
+        matcher_us = timeit.timeit(lambda: matcher.find(query), number=runs) / runs * 1e6
+        naive_us = timeit.timeit(lambda: naive_find(aliases, query), number=runs // 10) / (runs // 10) * 1e6
+        print(f"{n_plants:>7} {len(aliases):>8} {build_ms:>9.1f} {matcher_us:>11.1f} {naive_us:>9.1f}")
+        print(f"        -> {matcher.find(query)}")
@@ -3,22 +3,460 @@ Clean Data Processor - Uses files/ folder
 """
 
 import pandas as pd
+import numpy as np
+import openpyxl
 import os
 import logging
+import multiprocessing
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
-from typing import Dict, Optional, List
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import Callable, Dict, Optional, List
+
+from frame_snapshot import attach_frame_snapshot, snapshot_lock, sources_token, write_frame_snapshot
+from kpi_cube import KPICube
+from metrics import LOAD_PHASE_SECONDS
+from plant_cache import (CachedPlant, FrameLRU, file_fingerprint, read_cached_frame,
+                         read_cached_plant, write_cached_frame)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+DATE_COLUMNS = ['Date', 'date', 'DATE', 'Timestamp', 'timestamp']
+
+NUMERIC_COLUMNS = [
+    'PA(%)', 'PR(%)', 'CUF(%)', 'Mtr_Export (kWh)', 'Gen_Exp (kWh)',
+    'Amb_Temp(°C)', 'GHI-UP (KWh/m2)', 'WS_Avg(m/s)',
+    'Mtr_Import (kWh)', 'Mtr_Net_Exp (KWh)', 'Operational Capacity (MW)'
+]
+
+# Ratios and weather readings are stored as float32 in compact mode. Energy
+# columns stay float64 so multi-year portfolio totals keep their precision.
+FLOAT32_COLUMNS = [
+    'PA(%)', 'PR(%)', 'CUF(%)', 'Amb_Temp(°C)', 'WS_Avg(m/s)', 'GHI-UP (KWh/m2)'
+]
+
+# Text columns with at most this share of distinct values become categoricals
+CATEGORY_MAX_RATIO = 0.5
+
+# How far down the sheet to look for the header row
+HEADER_SCAN_ROWS = 20
+
+# Loads run on background threads next to the serving threads; forking such a process can
+# hand the parser children locks (logging, allocator) held by another thread
+POOL_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+# Metrics carried into the consolidated cross-plant frame
+PORTFOLIO_COLUMNS = ['Mtr_Export (kWh)', 'PA(%)', 'PR(%)', 'CUF(%)']
+
+# Summary key prefix -> portfolio column, each materialized as _mean/_max/_min (plus export_total)
+SUMMARY_METRICS = {
+    'export': 'Mtr_Export (kWh)',
+    'availability': 'PA(%)',
+    'performance_ratio': 'PR(%)',
+    'capacity_utilization': 'CUF(%)'
+}
+
+
+def _plant_name_from_file(file: str) -> str:
+    # Clean plant name from DGR_ prefix
+    return file.replace('DGR_', '').replace('.xlsx', '')
+
+
+def _load_plant_file(file_path: str, plant_name: str, compact: bool = True,
+                     phases: Optional[Dict[str, float]] = None):
+    """Read and clean one workbook. Module level so process pool workers can pickle it.
+    
+    phases, if given, receives the seconds spent reading and cleaning.
+    """
+    started = time.perf_counter()
+    try:
+        df = _read_daily_kpi(file_path)
+    except ValueError as e:
+        # Unusual layout: fall back to materializing the whole sheet
+        logger.info(f"   Streaming reader skipped for {plant_name} ({str(e)}), using read_excel")
+        df = pd.read_excel(file_path, sheet_name='Daily KPI')
+    logger.info(f"   Successfully read Daily KPI sheet ({plant_name})")
+    read_done = time.perf_counter()
+    if phases is not None:
+        phases['read_excel'] = read_done - started
+    
+    if not compact:
+        cleaned_df = _clean_plant_frame(df, plant_name)
+        if phases is not None:
+            phases['clean'] = time.perf_counter() - read_done
+        return cleaned_df
+    
+    read_bytes = df.memory_usage(deep=True).sum()
+    # The frame was just read and is ours, so clean it in place
+    cleaned_df = _clean_plant_frame(df, plant_name, copy=False)
+    if cleaned_df is not None:
+        cleaned_df = _compact_frame(cleaned_df)
+    if phases is not None:
+        phases['clean'] = time.perf_counter() - read_done
+    if cleaned_df is None:
+        return None
+    
+    logger.info(f"   Memory for {plant_name}: {read_bytes / 1024:,.1f} KB as read -> "
+                f"{cleaned_df.memory_usage(deep=True).sum() / 1024:,.1f} KB compact")
+    return cleaned_df
+
+
+def _load_plant_file_timed(file_path: str, plant_name: str, compact: bool = True):
+    """_load_plant_file for pool workers: phase timings travel back with the frame"""
+    phases = {}
+    return _load_plant_file(file_path, plant_name, compact, phases), phases
+
+
+def _compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Drop unused columns, narrow dtypes and index by sorted date"""
+    keep = ['Date'] + [col for col in df.columns if col in NUMERIC_COLUMNS]
+    extra_text = [col for col in df.columns
+                  if col not in keep and col not in DATE_COLUMNS and pd.api.types.is_string_dtype(df[col])]
+    
+    compact = df[keep + [col for col in extra_text
+                         if df[col].nunique() <= CATEGORY_MAX_RATIO * len(df)]]
+    
+    columns = {}
+    for col in compact.columns:
+        if col in FLOAT32_COLUMNS:
+            columns[col] = compact[col].to_numpy(dtype=np.float32)
+        elif col in extra_text:
+            columns[col] = pd.Categorical(compact[col])
+        else:
+            columns[col] = compact[col].to_numpy()
+    
+    return pd.DataFrame(columns, index=compact.index)
+
+
+def _date_bounds(index: pd.DatetimeIndex, start_date, end_date):
+    """Positions of [start_date, end_date] (both inclusive) in a sorted DatetimeIndex"""
+    return (index.searchsorted(pd.Timestamp(start_date), side='left'),
+            index.searchsorted(pd.Timestamp(end_date), side='right'))
+
+
+def _to_float(value) -> float:
+    if value is None:
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _read_daily_kpi(file_path: str) -> pd.DataFrame:
+    """Stream the Daily KPI sheet, keeping only the date and NUMERIC_COLUMNS.
+    
+    Cells go straight into float arrays, so the unused columns and the
+    object-dtype frame read_excel would build never exist.
+    """
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheet = workbook['Daily KPI']
+        rows = sheet.iter_rows(values_only=True)
+        
+        header = None
+        for _, row in zip(range(HEADER_SCAN_ROWS), rows):
+            names = [str(v).strip() if v is not None else None for v in row]
+            if any(col in names for col in DATE_COLUMNS):
+                header = names
+                break
+        
+        if header is None:
+            raise ValueError("no header row with a date column")
+        
+        date_col = next(col for col in DATE_COLUMNS if col in header)
+        date_pos = header.index(date_col)
+        # First occurrence wins, like read_excel keeps the unsuffixed name
+        positions = [(col, header.index(col)) for col in NUMERIC_COLUMNS if col in header]
+        last_pos = max([date_pos] + [pos for _, pos in positions])
+        
+        dates = []
+        values = {col: array('d') for col, _ in positions}
+        for row in rows:
+            if len(row) <= last_pos:
+                row = tuple(row) + (None,) * (last_pos + 1 - len(row))
+            
+            date_value = row[date_pos]
+            if date_value is None and all(row[pos] is None for _, pos in positions):
+                continue
+            
+            dates.append(date_value)
+            for col, pos in positions:
+                values[col].append(_to_float(row[pos]))
+    finally:
+        workbook.close()
+    
+    columns = {'Date': pd.to_datetime(pd.Series(dates, dtype=object), errors='coerce')}
+    for col, _ in positions:
+        columns[col] = np.frombuffer(values[col], dtype=np.float64)
+    return pd.DataFrame(columns)
+
+
+def _clean_plant_frame(df, plant_name, copy: bool = True):
+    try:
+        logger.info(f"   Cleaning data for {plant_name}")
+        cleaned_df = df.copy() if copy else df
+        
+        # Find date column
+        date_col = None
+        
+        for col in DATE_COLUMNS:
+            if col in cleaned_df.columns:
+                date_col = col
+                break
+        
+        if date_col:
+            cleaned_df['Date'] = pd.to_datetime(cleaned_df[date_col], errors='coerce')
+            logger.info(f"   Converted date column: {date_col}")
+        else:
+            logger.warning(f"   No date column found")
+            return None
+        
+        # Remove invalid dates
+        initial_count = len(cleaned_df)
+        cleaned_df = cleaned_df.dropna(subset=['Date'])
+        final_count = len(cleaned_df)
+        
+        if final_count == 0:
+            logger.warning(f"   No valid dates found")
+            return None
+        
+        if initial_count != final_count:
+            logger.info(f"   Removed {initial_count - final_count} rows with invalid dates")
+        
+        # Convert numeric columns
+        for col in NUMERIC_COLUMNS:
+            if col in cleaned_df.columns:
+                cleaned_df[col] = pd.to_numeric(cleaned_df[col], errors='coerce')
+        
+        # Sorted DatetimeIndex: date lookups become binary searches instead of scans
+        cleaned_df = cleaned_df.sort_values('Date', kind='mergesort')
+        cleaned_df.index = pd.DatetimeIndex(cleaned_df['Date'].to_numpy())
+        
+        logger.info(f"   Final data shape: {cleaned_df.shape}")
+        return cleaned_df
+        
+    except Exception as e:
+        logger.error(f"   Error cleaning data for {plant_name}: {str(e)}")
+        return None
+
+
+class _LazyFrames(Mapping):
+    """plant -> frame mapping that loads cached plants on access"""
+    
+    def __init__(self, entries, loader: Callable):
+        self._entries = entries
+        self._loader = loader
+    
+    def __getitem__(self, plant_name):
+        entry = self._entries[plant_name]
+        if isinstance(entry, CachedPlant):
+            return self._loader(entry)
+        return entry
+    
+    def __contains__(self, plant_name):
+        # Mapping's default would go through __getitem__ and page the frame in
+        return plant_name in self._entries
+    
+    def __iter__(self):
+        return iter(self._entries)
+    
+    def __len__(self):
+        return len(self._entries)
+
+
+class PlantDataset:
+    """Immutable set of loaded plants. Reloads publish a new instance instead of mutating this one."""
+    
+    def __init__(self, version: int, entries: Dict[str, object], sources: Dict[str, tuple],
+                 loader: Optional[Callable] = None, mode: str = 'compact',
+                 column_loader: Optional[Callable] = None):
+        self.version = version
+        # Same workbooks and cleaning -> same token in every process, unlike version
+        self.token = sources_token(sources, mode)
+        # plant -> DataFrame, or CachedPlant when frames are loaded lazily through loader
+        self.entries = MappingProxyType(dict(entries))
+        self.plant_data = _LazyFrames(self.entries, loader) if loader else self.entries
+        self.available_plants = tuple(entries)
+        # workbook file -> (size, mtime_ns) it was loaded from, including files that failed to load
+        self.sources = MappingProxyType(dict(sources))
+        # (CachedPlant, columns) -> frame of just those columns, read around the frame LRU
+        self._column_loader = column_loader
+        self.portfolio_frame = self._build_portfolio_frame()
+        # Raw arrays behind the portfolio frame, reused to build the range-query cube
+        self.portfolio_dates = self.portfolio_frame.index.to_numpy()
+        self.portfolio_codes = self.portfolio_frame['Plant'].cat.codes.to_numpy()
+        self.cube = KPICube.from_arrays(
+            list(self.available_plants), PORTFOLIO_COLUMNS, self.portfolio_codes, self.portfolio_dates,
+            self.portfolio_frame[PORTFOLIO_COLUMNS].to_numpy(dtype=np.float64)
+        )
+        self.summary_table = self._build_summary_table()
+        # plant -> summary dict, so per-plant lookups never touch a frame
+        self.plant_summaries = MappingProxyType({
+            plant_name: {key: (value.item() if hasattr(value, 'item') else value) for key, value in row.items()}
+            for plant_name, row in self.summary_table.to_dict('index').items()
+        })
+    
+    def _build_portfolio_frame(self) -> pd.DataFrame:
+        """One long table of every plant's PORTFOLIO_COLUMNS, indexed and sorted by date.
+        
+        Plant is a categorical in available_plants order, so cross-plant intents are a
+        single groupby and one day across the portfolio is one contiguous index slice.
+        """
+        parts = []
+        for code, plant_name in enumerate(self.available_plants):
+            df = self._portfolio_source(plant_name)
+            if df is None or df.empty or 'Date' not in df.columns:
+                continue
+            
+            part = {'Plant': np.full(len(df), code, dtype=np.int32), 'Date': df['Date'].to_numpy()}
+            for col in PORTFOLIO_COLUMNS:
+                part[col] = df[col].to_numpy() if col in df.columns else np.full(len(df), np.nan)
+            parts.append(pd.DataFrame(part))
+        
+        if not parts:
+            frame = pd.DataFrame({'Plant': np.array([], dtype=np.int32), 'Date': pd.to_datetime([])})
+            for col in PORTFOLIO_COLUMNS:
+                frame[col] = np.array([], dtype=np.float64)
+        else:
+            frame = pd.concat(parts, ignore_index=True)
+        
+        frame = frame.sort_values(['Date', 'Plant'], kind='mergesort')
+        frame['Plant'] = pd.Categorical.from_codes(frame['Plant'].to_numpy(), categories=list(self.available_plants))
+        frame.index = pd.DatetimeIndex(frame['Date'].to_numpy())
+        return frame
+    
+    def _portfolio_source(self, plant_name: str):
+        entry = self.entries[plant_name]
+        if isinstance(entry, CachedPlant) and self._column_loader:
+            # Lazy plants: read only the portfolio columns instead of paging whole frames through the LRU
+            return self._column_loader(entry, ['Date'] + PORTFOLIO_COLUMNS)
+        return self.plant_data.get(plant_name)
+    
+    def _build_summary_table(self) -> pd.DataFrame:
+        """Per-plant record counts, date range, export total and mean/max/min of SUMMARY_METRICS in one grouped pass"""
+        aggregations = {
+            'records': ('Date', 'size'),
+            'start_date': ('Date', 'min'),
+            'end_date': ('Date', 'max')
+        }
+        for key, col in SUMMARY_METRICS.items():
+            if key == 'export':
+                aggregations['export_total'] = (col, 'sum')
+                aggregations['export_readings'] = (col, 'count')
+            for stat in ('mean', 'max', 'min'):
+                aggregations[f'{key}_{stat}'] = (col, stat)
+        
+        summary = self.portfolio_frame.groupby('Plant', observed=True).agg(**aggregations)
+        # A grouped sum of nothing is 0.0; like sum(min_count=1), keep plants without readings NaN
+        summary['export_total'] = summary['export_total'].where(summary.pop('export_readings') > 0)
+        summary.index = summary.index.astype(str)
+        return summary
+    
+    def get_plant_data(self, plant_name: str):
+        return self.plant_data.get(plant_name)
+    
+    def get_available_plants(self):
+        return list(self.available_plants)
+    
+    def iter_plant_data(self):
+        """Yield (plant, frame) one at a time so lazy datasets never hold every frame at once"""
+        for plant_name in self.available_plants:
+            df = self.plant_data.get(plant_name)
+            if df is not None:
+                yield plant_name, df
+
+
 class DataProcessor:
-    def __init__(self, data_folder: str = "files"):
+    def __init__(self, data_folder: str = "files", workers: Optional[int] = None,
+                 cache_folder: Optional[str] = ".kpi_cache", lazy: bool = False,
+                 memory_budget_mb: float = 256, compact: bool = True, mmap_snapshot: bool = True):
         self.data_folder = data_folder
-        self.plant_data = {}
-        self.available_plants = []
+        # None = one worker per core, 1 = load serially in this process
+        self.workers = workers
+        # Compact frames: used columns only, float32 ratios, sorted DatetimeIndex
+        self.compact = compact
+        # None disables the cleaned-frame cache; compact and full frames are cached apart
+        mode = 'compact' if compact else 'full'
+        self.mode = mode
+        self.cache_folder = os.path.join(cache_folder, mode) if cache_folder else None
+        
+        # Lazy mode pages plant frames in from the cache within memory_budget_mb. The
+        # portfolio table (date plus PORTFOLIO_COLUMNS per row), the range cube and the
+        # summaries stay resident on top of that budget; they are built from the cached
+        # columns directly, so loading does not pull every full frame through the LRU
+        if lazy and not cache_folder:
+            logger.warning("Lazy loading needs the frame cache, loading eagerly instead")
+            lazy = False
+        self.lazy = lazy
+        
+        # Eager frames are served from a read-only memory-mapped export that every
+        # process loading the same workbooks attaches instead of holding its own copy
+        self.snapshot_folder = None
+        if cache_folder and mmap_snapshot and not lazy:
+            self.snapshot_folder = os.path.join(cache_folder, 'snapshots', mode)
+        self._frame_lru = FrameLRU(int(memory_budget_mb * 1024 * 1024)) if lazy else None
+        
+        self.dataset = PlantDataset(0, {}, {})
+        self._pinned = threading.local()
+        self._reload_lock = threading.Lock()
+        self._watcher = None
+        self._watcher_stop = threading.Event()
+        # Progress of load_all_plants, readable from other threads while it runs
+        self._progress = {'state': 'idle', 'loaded': 0, 'total': 0, 'started': None, 'finished': None}
         logger.info(f"DataProcessor initialized with folder: {data_folder}")
     
+    @property
+    def plant_data(self):
+        return self._current().plant_data
+    
+    @property
+    def available_plants(self):
+        return self._current().get_available_plants()
+    
+    def _current(self) -> PlantDataset:
+        return getattr(self._pinned, 'dataset', None) or self.dataset
+    
+    def snapshot(self) -> PlantDataset:
+        return self.dataset
+    
+    @contextmanager
+    def pinned(self, dataset: Optional[PlantDataset] = None):
+        """Serve every lookup on this thread from one dataset version, even if a reload swaps it meanwhile"""
+        previous = getattr(self._pinned, 'dataset', None)
+        self._pinned.dataset = dataset or previous or self.dataset
+        try:
+            yield self._pinned.dataset
+        finally:
+            self._pinned.dataset = previous
+    
     def load_all_plants(self) -> bool:
+        self._progress.update(state='loading', loaded=0, total=0, started=time.monotonic(), finished=None)
+        with LOAD_PHASE_SECONDS.time('total'):
+            success = self._load_all_plants()
+        self._progress.update(state='ready' if success else 'failed', finished=time.monotonic())
+        return success
+    
+    def load_progress(self) -> Dict:
+        """State of load_all_plants, workbooks processed out of total and elapsed seconds"""
+        progress = dict(self._progress)
+        started, finished = progress.pop('started'), progress.pop('finished')
+        progress['loaded'] = min(progress['loaded'], progress['total'])
+        progress['elapsed_seconds'] = round((finished or time.monotonic()) - started, 2) if started else 0.0
+        return progress
+    
+    def _advance_progress(self, files: int = 1):
+        if self._progress['state'] == 'loading':
+            self._progress['loaded'] += files
+    
+    def _load_all_plants(self) -> bool:
         try:
             logger.info("Loading power plant data from Excel files...")
             
@@ -26,112 +464,374 @@ class DataProcessor:
                 logger.error(f"Data folder not found: {self.data_folder}")
                 return False
             
-            excel_files = [f for f in os.listdir(self.data_folder) if f.endswith('.xlsx')]
+            sources = self._scan_files()
+            excel_files = list(sources)
             
             if not excel_files:
                 logger.error(f"No Excel files found in {self.data_folder}")
                 return False
             
             logger.info(f"Found {len(excel_files)} Excel files")
+            self._progress['total'] = len(excel_files)
             
-            loaded_count = 0
-            for file in excel_files:
-                # Clean plant name from DGR_ prefix
-                plant_name = file.replace('DGR_', '').replace('.xlsx', '')
-                file_path = os.path.join(self.data_folder, file)
-                
-                logger.info(f"Loading: {plant_name}")
+            # Workers starting together load one at a time: the first parses and
+            # publishes the snapshot, the others wait here and then attach it
+            with snapshot_lock(self.snapshot_folder):
+                attached = self._attach_snapshot(sources)
+                if attached is None:
+                    frames = self._parse_all(excel_files, sources)
+            
+            if attached is not None:
+                with self._reload_lock:
+                    self.dataset = self._new_dataset(self.dataset.version + 1, attached, sources)
+                self._advance_progress(len(excel_files))
                 
-                try:
-                    df = pd.read_excel(file_path, sheet_name='Daily KPI')
-                    logger.info(f"   Successfully read Daily KPI sheet")
-                    
-                    cleaned_df = self._clean_data(df, plant_name)
-                    
-                    if cleaned_df is not None and not cleaned_df.empty:
-                        self.plant_data[plant_name] = cleaned_df
-                        self.available_plants.append(plant_name)
-                        loaded_count += 1
-                        
-                        logger.info(f"   Loaded {len(cleaned_df)} records")
-                        if 'Date' in cleaned_df.columns:
-                            logger.info(f"   Date range: {cleaned_df['Date'].min().strftime('%Y-%m-%d')} to {cleaned_df['Date'].max().strftime('%Y-%m-%d')}")
-                    else:
-                        logger.warning(f"   No valid data after cleaning")
-                        
-                except Exception as e:
-                    logger.warning(f"   Error loading {plant_name}: {str(e)}")
-                    continue
+                logger.info(f"Attached snapshot with {len(attached)} plants")
+                self._log_summary_stats()
+                return len(attached) > 0
+            
+            with self._reload_lock:
+                self.dataset = self._new_dataset(self.dataset.version + 1, frames, sources)
             
-            logger.info(f"Successfully loaded {loaded_count} plants")
+            logger.info(f"Successfully loaded {len(frames)} plants")
             self._log_summary_stats()
-            return loaded_count > 0
+            return len(frames) > 0
             
         except Exception as e:
             logger.error(f"Error in load_all_plants: {str(e)}")
             return False
     
-    def _clean_data(self, df, plant_name):
-        try:
-            logger.info(f"   Cleaning data for {plant_name}")
-            cleaned_df = df.copy()
-            
-            # Find date column
-            date_columns = ['Date', 'date', 'DATE', 'Timestamp', 'timestamp']
-            date_col = None
-            
-            for col in date_columns:
-                if col in cleaned_df.columns:
-                    date_col = col
-                    break
+    def _parse_all(self, excel_files: List[str], sources: Dict[str, tuple]) -> Dict[str, pd.DataFrame]:
+        results = self._load_files(excel_files)
+        
+        frames = {}
+        # Keep directory order so plant ordering does not depend on how a plant was loaded
+        for file in excel_files:
+            if file in results and self._accept_plant(*results[file]):
+                plant_name, entry = results[file]
+                frames[plant_name] = entry
+        
+        return self._publish_snapshot(sources, frames)
+    
+    def reload_changed(self, on_swap: Optional[Callable] = None) -> Optional[Dict[str, List[str]]]:
+        """Reload only workbooks that were added, changed or removed, then swap in a new dataset.
+        
+        Returns the plant names per change type, or None when nothing changed.
+        """
+        with self._reload_lock:
+            old = self.dataset
+            sources = self._scan_files()
             
-            if date_col:
-                cleaned_df['Date'] = pd.to_datetime(cleaned_df[date_col], errors='coerce')
-                logger.info(f"   Converted date column: {date_col}")
-            else:
-                logger.warning(f"   No date column found")
+            added = [f for f in sources if f not in old.sources]
+            changed = [f for f in sources if f in old.sources and sources[f] != old.sources[f]]
+            removed = [f for f in old.sources if f not in sources]
+            if not (added or changed or removed):
                 return None
             
-            # Remove invalid dates
-            initial_count = len(cleaned_df)
-            cleaned_df = cleaned_df.dropna(subset=['Date'])
-            final_count = len(cleaned_df)
-            
-            if final_count == 0:
-                logger.warning(f"   No valid dates found")
-                return None
+            logger.info(f"Workbook changes detected: {len(added)} added, {len(changed)} changed, {len(removed)} removed")
+            # Every process watching the folder sees the change; whichever takes the lock
+            # first parses and publishes, the rest attach its snapshot by token
+            with snapshot_lock(self.snapshot_folder):
+                frames = self._attach_snapshot(sources)
+                if frames is not None:
+                    logger.info("Attached snapshot published by another process")
+                else:
+                    frames = self._reload_frames(old, sources, added + changed, changed + removed)
             
-            if initial_count != final_count:
-                logger.info(f"   Removed {initial_count - final_count} rows with invalid dates")
+            new = self._new_dataset(old.version + 1, frames, sources)
+            self.dataset = new
+        
+        changes = {
+            'added': [p for p in new.available_plants if p not in old.plant_data],
+            'changed': [_plant_name_from_file(f) for f in changed if _plant_name_from_file(f) in new.plant_data],
+            'removed': [p for p in old.available_plants if p not in new.plant_data]
+        }
+        logger.info(f"Dataset version {new.version} live with {len(frames)} plants")
+        
+        if on_swap:
+            on_swap(old, new, changes)
+        return changes
+    
+    def _reload_frames(self, old: PlantDataset, sources: Dict[str, tuple], to_load: List[str],
+                       stale: List[str]) -> Dict[str, pd.DataFrame]:
+        """Parse to_load, keep the other unchanged plants of old, and publish the result"""
+        results = self._load_files(to_load)
+        
+        stale_plants = {_plant_name_from_file(f) for f in stale}
+        frames = {}
+        for file in sources:
+            plant_name = _plant_name_from_file(file)
+            if file in results:
+                if self._accept_plant(*results[file]):
+                    frames[plant_name] = results[file][1]
+            elif plant_name in old.entries and plant_name not in stale_plants:
+                frames[plant_name] = old.entries[plant_name]
+        
+        return self._publish_snapshot(sources, frames)
+    
+    def start_watcher(self, interval: float = 60, on_swap: Optional[Callable] = None):
+        """Poll the data folder in a daemon thread and hot reload changed workbooks"""
+        if self._watcher and self._watcher.is_alive():
+            return
+        
+        def watch():
+            while not self._watcher_stop.wait(interval):
+                try:
+                    self.reload_changed(on_swap)
+                except Exception as e:
+                    logger.error(f"Error reloading workbooks: {str(e)}")
+        
+        self._watcher_stop.clear()
+        self._watcher = threading.Thread(target=watch, name="workbook-watcher", daemon=True)
+        self._watcher.start()
+        logger.info(f"Watching {self.data_folder} for workbook changes every {interval}s")
+    
+    def stop_watcher(self):
+        self._watcher_stop.set()
+        if self._watcher:
+            self._watcher.join()
+            self._watcher = None
+    
+    def _scan_files(self) -> Dict[str, tuple]:
+        sources = {}
+        for file in os.listdir(self.data_folder):
+            if not file.endswith('.xlsx') or file.startswith('~$'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.data_folder, file))
+            except OSError:
+                continue
+            sources[file] = (stat.st_size, stat.st_mtime_ns)
+        return sources
+    
+    def _load_files(self, excel_files: List[str]):
+        results, fingerprints = self._load_cached(excel_files)
+        stale_files = [f for f in excel_files if f not in results]
+        
+        if stale_files:
+            workers = self._resolve_workers(len(stale_files))
+            if workers > 1:
+                parsed = self._load_files_parallel(stale_files, workers)
+            else:
+                parsed = self._load_files_serial(stale_files)
             
-            # Convert numeric columns
-            numeric_columns = [
-                'PA(%)', 'PR(%)', 'CUF(%)', 'Mtr_Export (kWh)', 'Gen_Exp (kWh)',
-                'Amb_Temp(°C)', 'GHI-UP (KWh/m2)', 'WS_Avg(m/s)',
-                'Mtr_Import (kWh)', 'Mtr_Net_Exp (KWh)', 'Operational Capacity (MW)'
-            ]
+            for file, (plant_name, cleaned_df) in parsed.items():
+                results[file] = (plant_name, cleaned_df)
+                if file not in fingerprints or cleaned_df is None or cleaned_df.empty:
+                    continue
+                
+                if write_cached_frame(self.cache_folder, plant_name, fingerprints[file], cleaned_df) and self.lazy:
+                    cached = read_cached_plant(self.cache_folder, plant_name, fingerprints[file])
+                    if cached:
+                        # Just parsed, so it is the hottest frame we have
+                        self._frame_lru.put((plant_name, cached.fingerprint['sha256']), cleaned_df)
+                        results[file] = (plant_name, cached)
+        
+        return results
+    
+    def _attach_snapshot(self, sources: Dict[str, tuple]) -> Optional[Dict[str, pd.DataFrame]]:
+        if not self.snapshot_folder:
+            return None
+        return attach_frame_snapshot(self.snapshot_folder, sources_token(sources, self.mode))
+    
+    def _publish_snapshot(self, sources: Dict[str, tuple], frames: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+        """Export freshly loaded frames and swap them for views of the mapped export"""
+        if not self.snapshot_folder or not frames:
+            return frames
+        
+        token = sources_token(sources, self.mode)
+        if not write_frame_snapshot(self.snapshot_folder, token, frames):
+            return frames
+        
+        attached = attach_frame_snapshot(self.snapshot_folder, token)
+        return attached if attached is not None and list(attached) == list(frames) else frames
+    
+    def _resolve_workers(self, file_count: int) -> int:
+        workers = self.workers if self.workers is not None else (os.cpu_count() or 1)
+        return max(1, min(workers, file_count))
+    
+    def _load_cached(self, excel_files: List[str]):
+        """Pick up cleaned frames whose workbook fingerprint is unchanged"""
+        results = {}
+        fingerprints = {}
+        if not self.cache_folder:
+            return results, fingerprints
+        
+        for file in excel_files:
+            plant_name = _plant_name_from_file(file)
+            try:
+                fingerprints[file] = file_fingerprint(os.path.join(self.data_folder, file))
+            except OSError as e:
+                logger.warning(f"   Cannot fingerprint {plant_name}: {str(e)}")
+                continue
             
-            for col in numeric_columns:
-                if col in cleaned_df.columns:
-                    cleaned_df[col] = pd.to_numeric(cleaned_df[col], errors='coerce')
+            if self.lazy:
+                cached = read_cached_plant(self.cache_folder, plant_name, fingerprints[file])
+            else:
+                cached = read_cached_frame(self.cache_folder, plant_name, fingerprints[file])
+            if cached is not None:
+                logger.info(f"Loading: {plant_name} (cached)")
+                results[file] = (plant_name, cached)
+                self._advance_progress()
+        
+        if results:
+            logger.info(f"Loaded {len(results)} of {len(excel_files)} plants from cache")
+        return results, fingerprints
+    
+    def _load_files_serial(self, excel_files: List[str]):
+        results = {}
+        for file in excel_files:
+            plant_name = _plant_name_from_file(file)
+            file_path = os.path.join(self.data_folder, file)
             
-            logger.info(f"   Final data shape: {cleaned_df.shape}")
-            return cleaned_df
+            logger.info(f"Loading: {plant_name}")
             
-        except Exception as e:
-            logger.error(f"   Error cleaning data for {plant_name}: {str(e)}")
-            return None
+            try:
+                phases = {}
+                results[file] = (plant_name, _load_plant_file(file_path, plant_name, self.compact, phases))
+                self._record_phases(phases)
+            except Exception as e:
+                logger.warning(f"   Error loading {plant_name}: {str(e)}")
+            self._advance_progress()
+        return results
+    
+    def _load_files_parallel(self, excel_files: List[str], workers: int):
+        """Parse workbooks concurrently; a failing file only loses that plant"""
+        logger.info(f"Loading {len(excel_files)} workbooks with {workers} worker processes")
+        
+        results = {}
+        pending = []
+        try:
+            with ProcessPoolExecutor(max_workers=workers,
+                                     mp_context=multiprocessing.get_context(POOL_START_METHOD)) as executor:
+                futures = []
+                for file in excel_files:
+                    plant_name = _plant_name_from_file(file)
+                    file_path = os.path.join(self.data_folder, file)
+                    logger.info(f"Loading: {plant_name}")
+                    futures.append((file, plant_name, executor.submit(_load_plant_file_timed, file_path, plant_name, self.compact)))
+                
+                for file, plant_name, future in futures:
+                    try:
+                        cleaned_df, phases = future.result()
+                        results[file] = (plant_name, cleaned_df)
+                        self._record_phases(phases)
+                        self._advance_progress()
+                    except BrokenProcessPool:
+                        pending.append(file)
+                    except Exception as e:
+                        logger.warning(f"   Error loading {plant_name}: {str(e)}")
+                        self._advance_progress()
+        except (BrokenProcessPool, OSError) as e:
+            logger.warning(f"Process pool unavailable ({str(e)}), falling back to serial loading")
+            pending = [f for f in excel_files if f not in results]
+        
+        if pending:
+            results.update(self._load_files_serial(pending))
+        
+        return results
+    
+    def _record_phases(self, phases: Dict[str, float]):
+        for phase, seconds in phases.items():
+            LOAD_PHASE_SECONDS.observe(seconds, phase)
+    
+    def _accept_plant(self, plant_name: str, cleaned_df) -> bool:
+        if isinstance(cleaned_df, CachedPlant):
+            if not cleaned_df.rows:
+                logger.warning(f"   No valid data after cleaning for {plant_name}")
+                return False
+            logger.info(f"   Found {cleaned_df.rows} records for {plant_name} (loaded on demand)")
+            logger.info(f"   Date range: {cleaned_df.start} to {cleaned_df.end}")
+            return True
+        
+        if cleaned_df is None or cleaned_df.empty:
+            logger.warning(f"   No valid data after cleaning for {plant_name}")
+            return False
+        
+        logger.info(f"   Loaded {len(cleaned_df)} records for {plant_name}")
+        if 'Date' in cleaned_df.columns:
+            logger.info(f"   Date range: {cleaned_df['Date'].min().strftime('%Y-%m-%d')} to {cleaned_df['Date'].max().strftime('%Y-%m-%d')}")
+        return True
+    
+    def _clean_data(self, df, plant_name):
+        return _clean_plant_frame(df, plant_name)
     
     def get_plant_data(self, plant_name: str):
-        return self.plant_data.get(plant_name)
+        return self._current().get_plant_data(plant_name)
     
     def get_available_plants(self):
-        return self.available_plants.copy()
+        return self._current().get_available_plants()
+    
+    def iter_plant_data(self):
+        return self._current().iter_plant_data()
+    
+    def get_portfolio_frame(self) -> pd.DataFrame:
+        return self._current().portfolio_frame
+    
+    def get_summary_table(self) -> pd.DataFrame:
+        return self._current().summary_table
+    
+    def get_plant_summary(self, plant_name: str) -> Optional[Dict]:
+        """Full-history KPIs materialized when the dataset was loaded"""
+        summary = self._current().plant_summaries.get(plant_name)
+        return dict(summary) if summary is not None else None
+    
+    def get_plant_summaries(self) -> Dict[str, Dict]:
+        return dict(self._current().plant_summaries)
+    
+    def get_plant_day(self, plant_name: str, target_date):
+        """Rows of one plant for one calendar day, found by binary search on the date index"""
+        df = self.get_plant_data(plant_name)
+        if df is None:
+            return None
+        day = pd.Timestamp(target_date).normalize()
+        start, end = df.index.searchsorted([day, day + pd.Timedelta(days=1)])
+        return df.iloc[start:end]
+    
+    def get_day_totals(self, target_date, column: str = 'Mtr_Export (kWh)') -> Dict[str, float]:
+        """plant -> sum of column on one day, for plants with rows that day"""
+        cube = self.get_cube()
+        counts = cube.range_count(target_date, target_date, column)
+        totals = cube.range_sum(target_date, target_date, column)
+        return {plant: totals[plant] for plant, count in counts.items() if count > 0}
+    
+    def get_cube(self) -> KPICube:
+        return self._current().cube
+    
+    def range_sum(self, start_date, end_date, metric: str = 'Mtr_Export (kWh)', plants=None) -> Dict[str, float]:
+        """plant -> sum of metric between two dates (inclusive), O(1) per plant"""
+        return self.get_cube().range_sum(start_date, end_date, metric, plants)
+    
+    def range_mean(self, start_date, end_date, metric: str = 'PA(%)', plants=None) -> Dict[str, float]:
+        return self.get_cube().range_mean(start_date, end_date, metric, plants)
+    
+    def range_count(self, start_date, end_date, metric: str = 'Mtr_Export (kWh)', plants=None) -> Dict[str, int]:
+        return self.get_cube().range_count(start_date, end_date, metric, plants)
+    
+    def _load_lazy_frame(self, cached: CachedPlant):
+        key = (cached.plant, cached.fingerprint['sha256'])
+        df = self._frame_lru.get(key, lambda: read_cached_frame(self.cache_folder, cached.plant, cached.fingerprint))
+        if df is None:
+            logger.warning(f"Cached frame for {cached.plant} is no longer available")
+        return df
+    
+    def _load_lazy_columns(self, cached: CachedPlant, columns: List[str]):
+        return read_cached_frame(self.cache_folder, cached.plant, cached.fingerprint, columns)
+    
+    def _new_dataset(self, version: int, entries, sources) -> PlantDataset:
+        # Portfolio frame, range cube and summary table are all built here
+        with LOAD_PHASE_SECONDS.time('summary'):
+            if self.lazy:
+                return PlantDataset(version, entries, sources, self._load_lazy_frame, self.mode, self._load_lazy_columns)
+            return PlantDataset(version, entries, sources, None, self.mode)
     
     def filter_by_date_range(self, df, start_date, end_date):
         try:
             if 'Date' not in df.columns:
                 return df
+            if isinstance(df.index, pd.DatetimeIndex) and df.index.is_monotonic_increasing:
+                start, end = _date_bounds(df.index, start_date, end_date)
+                return df.iloc[start:end]
             mask = (df['Date'] >= pd.to_datetime(start_date)) & (df['Date'] <= pd.to_datetime(end_date))
             return df[mask]
         except Exception as e:
@@ -143,23 +843,20 @@ class DataProcessor:
     
     def _log_summary_stats(self):
         total_plants = len(self.plant_data)
-        total_records = sum(len(df) for df in self.plant_data.values())
+        total_records = 0
         
         total_energy = 0
         avg_availability = 0
         availability_count = 0
         
-        for plant_name, df in self.plant_data.items():
-            if 'Mtr_Export (kWh)' in df.columns:
-                plant_energy = df['Mtr_Export (kWh)'].sum()
-                if pd.notna(plant_energy):
-                    total_energy += plant_energy
-            
-            if 'PA(%)' in df.columns:
-                plant_availability = df['PA(%)'].mean()
-                if pd.notna(plant_availability):
-                    avg_availability += plant_availability
-                    availability_count += 1
+        for summary in self.get_plant_summaries().values():
+            total_records += summary['records']
+            if pd.notna(summary['export_total']):
+                total_energy += summary['export_total']
+            
+            if pd.notna(summary['availability_mean']):
+                avg_availability += summary['availability_mean']
+                availability_count += 1
         
         if availability_count > 0:
             avg_availability = avg_availability / availability_count
@@ -9,10 +9,17 @@ from datetime import datetime, timedelta
 import logging
 from typing import Dict, List, Optional, Tuple
 
+from kpi_cube import KPICube
+
 class DataProcessor:
     def __init__(self, plant_data: Dict[str, pd.DataFrame]):
         self.plant_data = plant_data
         self.logger = logging.getLogger(__name__)
+        self._cube = None
+        # plant -> (frame id, sorted dates, row order or None when already sorted)
+        self._date_index = {}
+        # (column, dtype) fingerprint -> resolved metric columns, see _resolve_schema
+        self._schema_cache = {}
     
     def get_available_plants(self) -> List[str]:
         """Get list of available plants"""
@@ -45,18 +52,15 @@ class DataProcessor:
             return None
     
     def get_plant_summary(self, plant_name: str, days: int = 30, start_date=None, end_date=None) -> Optional[Dict]:
-        """Get comprehensive plant summary with maximum robustness"""
+        """Get plant summary for a window: start_date/end_date if given, else the last `days` days of data"""
         try:
             plant_data = self.get_plant_data(plant_name)
             if plant_data is None or plant_data.empty:
                 self.logger.warning(f"No data available for plant {plant_name}")
                 return None
             
-            # Skip date filtering for now - use all available data
-            self.logger.info(f"Using all available data for {plant_name}: {len(plant_data)} rows")
-            
-            # Just use the data as-is without date filtering to avoid empty results
-            filtered_data = plant_data.copy()
+            filtered_data, date_range = self._window(plant_name, plant_data, days, start_date, end_date)
+            self.logger.info(f"Summarizing {plant_name}: {len(filtered_data)} of {len(plant_data)} rows ({date_range})")
             
             if filtered_data.empty:
                 return {
@@ -70,7 +74,7 @@ class DataProcessor:
             kpis = self._calculate_kpis_flexible(filtered_data, plant_name)
             kpis['plant_name'] = plant_name
             kpis['total_days'] = len(filtered_data)
-            kpis['date_range'] = 'All available data'
+            kpis['date_range'] = date_range
             
             return kpis
             
@@ -83,99 +87,164 @@ class DataProcessor:
                 'error': str(e)
             }
     
+    def _window(self, plant_name: str, df: pd.DataFrame, days: Optional[int], start_date, end_date) -> Tuple[pd.DataFrame, str]:
+        """Rows of the requested window and a label for it, without copying when the frame is date sorted"""
+        if 'Date' not in df.columns or (days is None or days <= 0) and start_date is None and end_date is None:
+            return df, 'All available data'
+        
+        dates, order = self._sorted_dates(plant_name, df)
+        if len(dates) == 0:
+            return df.iloc[0:0], 'No valid dates'
+        
+        if start_date is not None or end_date is not None:
+            start = np.datetime64(pd.Timestamp(start_date)) if start_date is not None else dates[0]
+            end = np.datetime64(pd.Timestamp(end_date)) if end_date is not None else dates[-1]
+        else:
+            # Anchor on the plant's latest reading so stale workbooks still summarize;
+            # blank or zero template rows past it do not count
+            end = self._last_reading_date(plant_name, df, dates, order)
+            start = np.datetime64(pd.Timestamp(end).normalize() - pd.Timedelta(days=days - 1))
+        
+        lo = dates.searchsorted(start, side='left')
+        hi = dates.searchsorted(end, side='right')
+        label = f"{pd.Timestamp(start).strftime('%Y-%m-%d')} to {pd.Timestamp(end).strftime('%Y-%m-%d')}"
+        
+        if order is None:
+            return df.iloc[lo:hi], label
+        return df.iloc[order[lo:hi]], label
+    
+    def _last_reading_date(self, plant_name: str, df: pd.DataFrame, dates: np.ndarray, order) -> np.datetime64:
+        """Date of the last row with a non-zero value in the resolved metric columns, else the last date"""
+        schema = self._resolve_schema(df, plant_name)
+        export_col = schema['found_metrics'].get('energy_export')
+        columns = [export_col] if export_col is not None else [col for _, col in schema['targets']]
+        if not columns:
+            return dates[-1]
+        
+        block = np.column_stack([pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64) for col in columns])
+        if order is not None:
+            block = block[order]
+        readings = np.flatnonzero((~np.isnan(block) & (block != 0)).any(axis=1))
+        return dates[readings[-1]] if len(readings) else dates[-1]
+    
+    def _sorted_dates(self, plant_name: str, df: pd.DataFrame):
+        """Sorted valid dates of a plant, memoized per frame; order is None when rows are already sorted"""
+        cached = self._date_index.get(plant_name)
+        if cached is not None and cached[0] is df:
+            return cached[1], cached[2]
+        
+        dates = pd.to_datetime(df['Date'], errors='coerce').to_numpy()
+        valid = ~np.isnat(dates)
+        if valid.all() and (len(dates) < 2 or (dates[1:] >= dates[:-1]).all()):
+            order = None
+        else:
+            order = np.flatnonzero(valid)[np.argsort(dates[valid], kind='stable')]
+            dates = dates[order]
+        
+        self._date_index[plant_name] = (df, dates, order)
+        return dates, order
+    
+    # Metric -> search terms; the first column whose name contains any term is used
+    COLUMN_MAPPINGS = {
+        'energy_export': ['export', 'energy', 'mtr', 'kwh', 'generation'],
+        'availability': ['availability', 'pa', '%'],
+        'performance_ratio': ['performance', 'pr', 'ratio'],
+        'capacity_utilization': ['capacity', 'cuf', 'utilization']
+    }
+    
+    def _resolve_schema(self, df: pd.DataFrame, plant_name: str) -> Dict:
+        """Column matching for a frame layout, computed once per (columns, dtypes) fingerprint"""
+        fingerprint = tuple((str(col), str(dtype)) for col, dtype in df.dtypes.items())
+        schema = self._schema_cache.get(fingerprint)
+        if schema is not None:
+            return schema
+        
+        numeric_columns = df.select_dtypes(include=[np.number]).columns.tolist()
+        self.logger.info(f"Found {len(numeric_columns)} numeric columns for {plant_name}")
+        
+        found_metrics = {}
+        for metric_name, search_terms in self.COLUMN_MAPPINGS.items():
+            for col in df.columns:
+                col_lower = str(col).lower()
+                if any(term in col_lower for term in search_terms):
+                    found_metrics[metric_name] = col
+                    self.logger.info(f"Found {metric_name} in column: {col}")
+                    break
+        
+        if found_metrics:
+            targets = [(f'{metric_name}_metrics', col) for metric_name, col in found_metrics.items()]
+        else:
+            # No standard metrics: summarize the first few numeric columns instead
+            targets = [(f'{col}_metrics', col) for col in numeric_columns[:5]]
+        
+        numeric_set = set(numeric_columns)
+        schema = {
+            'numeric_columns': numeric_columns,
+            'found_metrics': found_metrics,
+            'targets': targets,
+            # Already-numeric columns skip pd.to_numeric in the KPI pass
+            'needs_coercion': {col: col not in numeric_set for _, col in targets}
+        }
+        self._schema_cache[fingerprint] = schema
+        return schema
+    
     def _calculate_kpis_flexible(self, df: pd.DataFrame, plant_name: str) -> Dict:
         """Calculate KPIs with maximum flexibility for any column names"""
         kpis = {}
         
         try:
-            # Get all numeric columns
-            numeric_columns = df.select_dtypes(include=[np.number]).columns.tolist()
-            self.logger.info(f"Found {len(numeric_columns)} numeric columns for {plant_name}")
+            schema = self._resolve_schema(df, plant_name)
+            found_metrics = schema['found_metrics']
+            targets = schema['targets']
             
-            # Try to find key metrics with very flexible matching
-            column_mappings = {
-                'energy_export': ['export', 'energy', 'mtr', 'kwh', 'generation'],
-                'availability': ['availability', 'pa', '%'],
-                'performance_ratio': ['performance', 'pr', 'ratio'],
-                'capacity_utilization': ['capacity', 'cuf', 'utilization']
-            }
-            
-            found_metrics = {}
+            if found_metrics:
+                self.logger.debug(f"Using cached column mapping for {plant_name}")
+            else:
+                self.logger.info(f"No standard metrics found for {plant_name}, using general numeric analysis")
             
-            # Search for columns that might contain our metrics
-            for metric_name, search_terms in column_mappings.items():
-                found_columns = []
+            if targets:
+                # One fused pass: stack the metric columns and reduce them together
+                block = np.column_stack([
+                    pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64)
+                    if schema['needs_coercion'][col] else df[col].to_numpy(dtype=np.float64)
+                    for _, col in targets
+                ]) if len(df) else np.empty((0, len(targets)))
                 
-                for col in df.columns:
-                    col_lower = str(col).lower()
-                    for term in search_terms:
-                        if term in col_lower:
-                            found_columns.append(col)
-                            break
+                present = ~np.isnan(block)
+                counts = present.sum(axis=0)
+                filled = np.where(present, block, 0.0)
+                sums = filled.sum(axis=0)
+                maxes = np.where(present, block, -np.inf).max(axis=0, initial=-np.inf)
+                mins = np.where(present, block, np.inf).min(axis=0, initial=np.inf)
                 
-                if found_columns:
-                    # Use the first matching column
-                    found_metrics[metric_name] = found_columns[0]
-                    self.logger.info(f"Found {metric_name} in column: {found_columns[0]}")
-            
-            # Calculate metrics for found columns
-            for metric_name, column_name in found_metrics.items():
-                try:
-                    values = pd.to_numeric(df[column_name], errors='coerce').dropna()
-                    
-                    if len(values) > 0:
-                        if metric_name == 'energy_export':
-                            kpis[f'{metric_name}_metrics'] = {
-                                'total_export': float(values.sum()),
-                                'average': float(values.mean()),
-                                'max': float(values.max()),
-                                'min': float(values.min()),
-                                'data_points': len(values)
-                            }
-                        else:
-                            kpis[f'{metric_name}_metrics'] = {
-                                'average': float(values.mean()),
-                                'max': float(values.max()),
-                                'min': float(values.min()),
-                                'data_points': len(values)
-                            }
-                        
-                        self.logger.info(f"Calculated {metric_name} for {plant_name}: avg={values.mean():.2f}")
-                    else:
-                        self.logger.warning(f"No valid numeric data for {metric_name} in {plant_name}")
-                        
-                except Exception as e:
-                    self.logger.warning(f"Error calculating {metric_name} for {plant_name}: {str(e)}")
-            
-            # If no specific metrics found, create summary from any numeric data
-            if not found_metrics:
-                self.logger.info(f"No standard metrics found for {plant_name}, using general numeric analysis")
-                
-                # Use any numeric columns we can find
-                for col in numeric_columns[:5]:  # Use first 5 numeric columns
-                    try:
-                        values = pd.to_numeric(df[col], errors='coerce').dropna()
-                        if len(values) > 0:
-                            kpis[f'{col}_metrics'] = {
-                                'average': float(values.mean()),
-                                'max': float(values.max()),
-                                'min': float(values.min()),
-                                'data_points': len(values),
-                                'total': float(values.sum()) if values.sum() > 0 else 0
-                            }
-                    except Exception as e:
+                for i, (key, col) in enumerate(targets):
+                    if counts[i] == 0:
+                        if found_metrics:
+                            self.logger.warning(f"No valid numeric data for {key[:-len('_metrics')]} in {plant_name}")
                         continue
+                    
+                    metrics = {
+                        'average': float(sums[i] / counts[i]),
+                        'max': float(maxes[i]),
+                        'min': float(mins[i]),
+                        'data_points': int(counts[i])
+                    }
+                    if key == 'energy_export_metrics':
+                        metrics = {'total_export': float(sums[i]), **metrics}
+                    elif not found_metrics:
+                        metrics['total'] = float(sums[i]) if sums[i] > 0 else 0
+                    kpis[key] = metrics
             
             # Data completeness calculation
             total_cells = len(df) * len(df.columns)
-            non_null_cells = df.notna().sum().sum()
+            non_null_cells = int(df.count().sum())
             kpis['data_completeness_pct'] = (non_null_cells / total_cells) * 100 if total_cells > 0 else 0
             
             # Add basic info
             kpis['data_quality'] = {
                 'total_rows': len(df),
                 'total_columns': len(df.columns),
-                'numeric_columns': len(numeric_columns),
+                'numeric_columns': len(schema['numeric_columns']),
                 'completeness_pct': kpis['data_completeness_pct'],
                 'found_metrics': list(found_metrics.keys())
             }
@@ -195,14 +264,44 @@ class DataProcessor:
             }
     
     def filter_by_date_range(self, df: pd.DataFrame, start_date, end_date) -> pd.DataFrame:
-        """Filter by date range - now more flexible"""
+        """Filter by date range (inclusive); frames without a Date column are returned as-is"""
         if df is None or df.empty:
             return pd.DataFrame()
         
-        # For now, just return all data to avoid filtering issues
-        # This ensures we always have data to work with
-        self.logger.info(f"Returning all available data: {len(df)} rows")
-        return df
+        if 'Date' not in df.columns:
+            self.logger.info(f"No Date column, returning all available data: {len(df)} rows")
+            return df
+        
+        start = pd.Timestamp(start_date) if start_date is not None else None
+        end = pd.Timestamp(end_date) if end_date is not None else None
+        
+        # Sorted date index: slice by binary search instead of a boolean scan
+        if isinstance(df.index, pd.DatetimeIndex) and df.index.is_monotonic_increasing:
+            lo = df.index.searchsorted(start, side='left') if start is not None else 0
+            hi = df.index.searchsorted(end, side='right') if end is not None else len(df)
+            return df.iloc[lo:hi]
+        
+        dates = pd.to_datetime(df['Date'], errors='coerce')
+        mask = pd.Series(True, index=df.index)
+        if start is not None:
+            mask &= dates >= start
+        if end is not None:
+            mask &= dates <= end
+        return df[mask]
+    
+    def get_cube(self) -> KPICube:
+        """Dense plant x day cube over the standard KPI columns, built on first use"""
+        if self._cube is None:
+            self._cube = KPICube.from_frames((name, self.get_plant_data(name)) for name in self.get_available_plants())
+        return self._cube
+    
+    def range_sum(self, start_date, end_date, metric: str = 'Mtr_Export (kWh)', plants: Optional[List[str]] = None) -> Dict[str, float]:
+        """plant -> sum of metric between two dates (inclusive), O(1) per plant"""
+        return self.get_cube().range_sum(start_date, end_date, metric, plants)
+    
+    def range_mean(self, start_date, end_date, metric: str = 'PA(%)', plants: Optional[List[str]] = None) -> Dict[str, float]:
+        """plant -> mean of metric between two dates (inclusive)"""
+        return self.get_cube().range_mean(start_date, end_date, metric, plants)
     
     def clean_data(self, df: pd.DataFrame) -> pd.DataFrame:
         """Clean data - simplified for robustness"""
@@ -212,58 +311,73 @@ class DataProcessor:
         return df  # Return data as-is for now
     
     def compare_plants(self, plant_names: List[str], days: int = 30) -> pd.DataFrame:
-        """Compare multiple plants with maximum error handling"""
-        comparison_data = []
+        """Compare any number of plants over the same window with one grouped reduction"""
+        columns = ['Plant', 'Days', 'Total Export (kWh)', 'Avg Availability (%)',
+                   'Avg Performance Ratio (%)', 'Data Completeness (%)', 'Status']
+        metric_keys = ['energy_export', 'availability', 'performance_ratio']
         
+        rows = {}
+        codes, blocks = [], []
         for plant_name in plant_names:
+            if plant_name in rows:
+                continue
             try:
-                summary = self.get_plant_summary(plant_name, days)
-                if summary and not summary.get('error'):
-                    
-                    # Extract any available metrics
-                    energy_total = 0
-                    availability_avg = 0
-                    performance_avg = 0
-                    
-                    # Look for energy metrics
-                    for key, value in summary.items():
-                        if 'energy' in key.lower() and isinstance(value, dict):
-                            energy_total = value.get('total_export', value.get('total', 0))
-                        elif 'availability' in key.lower() and isinstance(value, dict):
-                            availability_avg = value.get('average', 0)
-                        elif 'performance' in key.lower() and isinstance(value, dict):
-                            performance_avg = value.get('average', 0)
-                    
-                    comparison_data.append({
-                        'Plant': plant_name,
-                        'Days': summary.get('total_days', 0),
-                        'Total Export (kWh)': energy_total,
-                        'Avg Availability (%)': availability_avg,
-                        'Avg Performance Ratio (%)': performance_avg,
-                        'Data Completeness (%)': summary.get('data_completeness_pct', 0),
-                        'Status': 'OK' if summary.get('total_days', 0) > 0 else 'No Data'
-                    })
-                else:
-                    comparison_data.append({
-                        'Plant': plant_name,
-                        'Days': 0,
-                        'Total Export (kWh)': 0,
-                        'Avg Availability (%)': 0,
-                        'Avg Performance Ratio (%)': 0,
-                        'Data Completeness (%)': 0,
-                        'Status': 'No Data'
-                    })
-                    
+                plant_data = self.get_plant_data(plant_name)
+                if plant_data is None or plant_data.empty:
+                    rows[plant_name] = (0, 0.0, 'No Data', None)
+                    continue
+                
+                window, _ = self._window(plant_name, plant_data, days, None, None)
+                if window.empty:
+                    rows[plant_name] = (0, 0.0, 'No Data', None)
+                    continue
+                
+                schema = self._resolve_schema(window, plant_name)
+                block = np.full((len(window), len(metric_keys)), np.nan)
+                for i, key in enumerate(metric_keys):
+                    col = schema['found_metrics'].get(key)
+                    if col is not None:
+                        block[:, i] = pd.to_numeric(window[col], errors='coerce').to_numpy(dtype=np.float64)
+                
+                if not (~np.isnan(block) & (block != 0)).any():
+                    # Only blank or zero template rows in the window
+                    rows[plant_name] = (0, 0.0, 'No Data', None)
+                    continue
+                
+                cells = len(window) * len(window.columns)
+                completeness = int(window.count().sum()) / cells * 100 if cells else 0
+                codes.append(np.full(len(window), len(blocks)))
+                rows[plant_name] = (len(window), completeness, 'OK', len(blocks))
+                blocks.append(block)
+                
             except Exception as e:
                 self.logger.error(f"Error comparing plant {plant_name}: {str(e)}")
-                comparison_data.append({
-                    'Plant': plant_name,
-                    'Days': 0,
-                    'Total Export (kWh)': 0,
-                    'Avg Availability (%)': 0,
-                    'Avg Performance Ratio (%)': 0,
-                    'Data Completeness (%)': 0,
-                    'Status': 'Error'
-                })
+                rows[plant_name] = (0, 0.0, 'Error', None)
+        
+        # Grouped sums and counts for every plant and metric at once
+        n_groups = len(blocks)
+        if n_groups:
+            all_codes = np.concatenate(codes)
+            values = np.vstack(blocks)
+            present = ~np.isnan(values)
+            sums = np.stack([np.bincount(all_codes, weights=np.where(present[:, i], values[:, i], 0.0), minlength=n_groups)
+                             for i in range(len(metric_keys))], axis=1)
+            counts = np.stack([np.bincount(all_codes, weights=present[:, i], minlength=n_groups)
+                               for i in range(len(metric_keys))], axis=1)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                means = np.where(counts > 0, sums / np.maximum(counts, 1), 0.0)
+        
+        comparison_data = []
+        for plant_name in plant_names:
+            days_count, completeness, status, group = rows[plant_name]
+            energy_total = availability_avg = performance_avg = 0
+            if group is not None:
+                energy_total = float(sums[group, 0]) if counts[group, 0] else 0
+                availability_avg = float(means[group, 1])
+                performance_avg = float(means[group, 2])
+            
+            comparison_data.append(dict(zip(columns, [
+                plant_name, days_count, energy_total, availability_avg, performance_avg, completeness, status
+            ])))
         
-        return pd.DataFrame(comparison_data)
+        return pd.DataFrame(comparison_data, columns=columns)
@@ -0,0 +1,177 @@
+"""
+Date Parser - precompiled extraction of dates and date ranges from queries
+
+Understands "today"/"yesterday", ISO and day-first numeric dates, "June 12",
+"12th June 2025", month names, "Q2 2024", "last N days/weeks/months" and
+"from ... to ..." ranges. Dates without a year resolve to their most recent
+occurrence on or before the anchor day (normally the last day with data).
+"""
+
+import re
+from collections import namedtuple
+from datetime import date, timedelta
+from typing import Optional, Tuple
+
+import pandas as pd
+
+# Inclusive range; single days have start == end
+DateRange = namedtuple('DateRange', ['start', 'end', 'relative'])
+
+MONTHS = {
+    'jan': 1, 'january': 1, 'feb': 2, 'february': 2, 'mar': 3, 'march': 3, 'apr': 4, 'april': 4,
+    'may': 5, 'jun': 6, 'june': 6, 'jul': 7, 'july': 7, 'aug': 8, 'august': 8,
+    'sep': 9, 'sept': 9, 'september': 9, 'oct': 10, 'october': 10, 'nov': 11, 'november': 11,
+    'dec': 12, 'december': 12,
+}
+
+_MONTH = r'(?:' + '|'.join(sorted(MONTHS, key=len, reverse=True)) + r')'
+_DAY = r'\d{1,2}(?:st|nd|rd|th)?(?!\d)'
+_YEAR = r'(?:19|20)\d{2}'
+
+# One pattern per single-date form, tried in this order on each expression
+_POINT_PATTERNS = [
+    ('iso', re.compile(rf'(?P<year>{_YEAR})-(?P<month>\d{{1,2}})-(?P<day>\d{{1,2}})')),
+    ('numeric', re.compile(rf'(?P<day>\d{{1,2}})[/.](?P<month>\d{{1,2}})[/.](?P<year>{_YEAR})')),
+    ('day_month', re.compile(rf'(?P<day>{_DAY})\s+(?:of\s+)?(?P<month>{_MONTH})\b(?:,?\s+(?P<year>{_YEAR}))?')),
+    ('month_day', re.compile(rf'(?P<month>{_MONTH})\s+(?P<day>{_DAY})(?:,?\s+(?P<year>{_YEAR}))?')),
+    ('quarter', re.compile(rf'q(?P<quarter>[1-4])(?:\s+(?P<year>{_YEAR}))?|(?P<year2>{_YEAR})\s+q(?P<quarter2>[1-4])')),
+    ('month', re.compile(rf'(?P<month>{_MONTH})\b(?:,?\s+(?P<year>{_YEAR}))?')),
+    ('relative_day', re.compile(r'today|yesterday')),
+]
+
+_POINT = (rf'(?:{_YEAR}-\d{{1,2}}-\d{{1,2}}|\d{{1,2}}[/.]\d{{1,2}}[/.]{_YEAR}'
+          rf'|{_DAY}\s+(?:of\s+)?{_MONTH}\b(?:,?\s+{_YEAR})?|{_MONTH}\s+{_DAY}(?:,?\s+{_YEAR})?'
+          rf'|q[1-4](?:\s+{_YEAR})?|{_YEAR}\s+q[1-4]|{_MONTH}\b(?:,?\s+{_YEAR})?|today|yesterday)')
+
+_RANGE_RE = re.compile(rf'\b(?:from\s+|between\s+)?(?P<start>{_POINT})\s*(?:to|and|until|till|through|-|–)\s*(?P<end>{_POINT})\b')
+_LAST_RE = re.compile(r'\b(?:last|past|previous)\s+(?:(?P<n>\d+)\s+)?(?P<unit>day|week|month|year)s?\b')
+_THIS_RE = re.compile(r'\bthis\s+(?P<unit>week|month|year)\b')
+_POINT_RE = re.compile(rf'\b{_POINT}\b')
+
+# A bare "may" is a month only after a preposition ("report for may", not "may i see")
+_MAY_CONTEXT_RE = re.compile(r'\b(?:in|for|during|of|from|to|until|through|since)\s+may\b')
+
+
+def _month_end(year: int, month: int) -> date:
+    return (date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1))
+
+
+def _latest_year(month: int, day: int, anchor: date) -> int:
+    """Year of the most recent month/day on or before anchor"""
+    year = anchor.year
+    if (month, day) > (anchor.month, anchor.day):
+        year -= 1
+    return year
+
+
+def _parse_point(text: str, today: date, anchor: date,
+                 year: Optional[int] = None) -> Optional[Tuple[date, date, bool]]:
+    """(start, end, explicit year) of one date expression, or None"""
+    for kind, pattern in _POINT_PATTERNS:
+        match = pattern.fullmatch(text)
+        if not match:
+            continue
+        groups = match.groupdict()
+
+        if kind == 'relative_day':
+            day = today if text == 'today' else today - timedelta(days=1)
+            return day, day, True
+
+        if kind == 'quarter':
+            quarter = int(groups['quarter'] or groups['quarter2'])
+            explicit = groups['year'] or groups['year2']
+            first_month = 3 * quarter - 2
+            q_year = int(explicit) if explicit else year or _latest_year(first_month, 1, anchor)
+            return date(q_year, first_month, 1), _month_end(q_year, first_month + 2), bool(explicit)
+
+        month = MONTHS[groups['month']] if not groups['month'].isdigit() else int(groups['month'])
+        explicit = groups.get('year')
+
+        if kind == 'month':
+            m_year = int(explicit) if explicit else year or _latest_year(month, 1, anchor)
+            return date(m_year, month, 1), _month_end(m_year, month), bool(explicit)
+
+        day_num = int(re.match(r'\d+', groups['day']).group())
+        d_year = int(explicit) if explicit else year or _latest_year(month, day_num, anchor)
+        try:
+            day = date(d_year, month, day_num)
+        except ValueError:
+            return None
+        return day, day, bool(explicit)
+
+    return None
+
+
+def parse_date_range(query: str, today: Optional[date] = None,
+                     anchor: Optional[date] = None) -> Optional[DateRange]:
+    """First date or date range mentioned in query, or None"""
+    query = query.lower()
+    today = today or date.today()
+    anchor = anchor or today
+
+    match = _RANGE_RE.search(query)
+    if match:
+        start = _parse_point(match.group('start'), today, anchor)
+        end = _parse_point(match.group('end'), today, anchor)
+        if start and end:
+            # A year given on one side applies to the other ("June 1 to June 5 2024");
+            # otherwise the end is the first occurrence on or after the start
+            if end[2] and not start[2]:
+                start = _parse_point(match.group('start'), today, anchor, end[0].year) or start
+            elif not end[2]:
+                end = _parse_point(match.group('end'), today, anchor, start[0].year) or end
+                if end[1] < start[0]:
+                    end = _parse_point(match.group('end'), today, anchor, start[0].year + 1) or end
+            if start[0] <= end[1]:
+                relative = 'today' in match.group(0) or 'yesterday' in match.group(0)
+                return DateRange(start[0], end[1], relative)
+
+    match = _LAST_RE.search(query)
+    if match:
+        n = int(match.group('n') or 1)
+        unit = match.group('unit')
+        if unit in ('day', 'week'):
+            start = today - timedelta(days=n * (7 if unit == 'week' else 1) - 1)
+        else:
+            offset = pd.DateOffset(months=n) if unit == 'month' else pd.DateOffset(years=n)
+            start = (pd.Timestamp(today) - offset).date() + timedelta(days=1)
+        return DateRange(start, today, True)
+
+    match = _THIS_RE.search(query)
+    if match:
+        unit = match.group('unit')
+        if unit == 'week':
+            start = today - timedelta(days=today.weekday())
+        elif unit == 'month':
+            start = today.replace(day=1)
+        else:
+            start = today.replace(month=1, day=1)
+        return DateRange(start, today, True)
+
+    for match in _POINT_RE.finditer(query):
+        text = match.group(0)
+        if text == 'may' and not _MAY_CONTEXT_RE.search(query):
+            continue
+        point = _parse_point(text, today, anchor)
+        if point:
+            return DateRange(point[0], point[1], text in ('today', 'yesterday'))
+
+    return None
+
+
+if __name__ == '__main__':
+    import timeit
+
+    samples = [
+        'generation report for june 12', '12th june 2025', 'energy yesterday', '2025-06-01 to 2025-06-07',
+        'from april 1 to june 30', 'last 7 days', 'past 2 weeks', 'q2 2024', 'march', 'may i see ese data',
+        'report for may', 'this month', '12/06/2025', 'between june 1 and june 5 2024', 'best plants',
+    ]
+    fixed_today, data_end = date(2025, 6, 15), date(2025, 6, 14)
+    for sample in samples:
+        print(f"{sample!r:40} -> {parse_date_range(sample, fixed_today, data_end)}")
+
+    runs = 20000
+    per_query = timeit.timeit(lambda: [parse_date_range(s, fixed_today, data_end) for s in samples],
+                              number=runs // len(samples)) / runs
+    print(f"parse_date_range: {per_query * 1e6:.1f}us per query")
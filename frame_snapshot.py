@@ -0,0 +1,165 @@
+"""
+Frame Snapshot - one memory-mapped export of every loaded plant frame
+
+All columns of one dtype, across all plants, are stored back to back in a
+single .npy block; index.json records where each plant's columns live.
+Attaching maps the blocks read-only and builds frames as views into them,
+so every process serving the same workbooks shares one copy in the page
+cache and a restarted worker is ready without reading the Excel files.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from plant_cache import CACHE_FORMAT_VERSION
+
+try:
+    import fcntl
+except ImportError:
+    # No cross-process lock on this platform; every process loads for itself
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the layout of a snapshot changes
+SNAPSHOT_FORMAT_VERSION = 1
+
+
+def sources_token(sources: Dict[str, tuple], mode: str = 'compact') -> str:
+    """Content token of a workbook set: equal scans give equal tokens in every process.
+
+    The cleaning code version (CACHE_FORMAT_VERSION) and the compact/full mode are
+    part of it, so frames cleaned differently never share a token.
+    """
+    payload = json.dumps([SNAPSHOT_FORMAT_VERSION, CACHE_FORMAT_VERSION, mode,
+                          sorted([file, list(stat)] for file, stat in sources.items())])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:20]
+
+
+def _mappable(series: pd.Series) -> bool:
+    return isinstance(series.dtype, np.dtype) and series.dtype.kind in 'biufcmM'
+
+
+def write_frame_snapshot(folder: str, token: str, frames: Dict[str, pd.DataFrame]) -> bool:
+    """Export frames under folder/token; an existing snapshot with that token is left alone"""
+    target = os.path.join(folder, token)
+    if os.path.exists(os.path.join(target, 'index.json')):
+        return True
+
+    blocks = {}  # dtype -> list of arrays, in write order
+    sizes = {}
+
+    def place(values: np.ndarray) -> Dict:
+        dtype = values.dtype.str
+        offset = sizes.get(dtype, 0)
+        blocks.setdefault(dtype, []).append(np.ascontiguousarray(values))
+        sizes[dtype] = offset + len(values)
+        return {'dtype': dtype, 'offset': offset, 'length': len(values)}
+
+    plants = []
+    for plant_name, df in frames.items():
+        columns = []
+        for name in df.columns:
+            series = df[name]
+            if isinstance(series.dtype, pd.CategoricalDtype) and all(
+                    isinstance(c, str) for c in series.cat.categories):
+                column = place(series.cat.codes.to_numpy())
+                column['categories'] = list(series.cat.categories)
+            elif _mappable(series):
+                column = place(series.to_numpy())
+            else:
+                logger.info(f"Snapshot skipped: {plant_name}.{name} has dtype {series.dtype}")
+                return False
+            column['name'] = str(name)
+            columns.append(column)
+
+        index = place(df.index.to_numpy()) if isinstance(df.index, pd.DatetimeIndex) else None
+        plants.append({'plant': plant_name, 'rows': len(df), 'columns': columns, 'index': index})
+
+    tmp = f"{target}.tmp{os.getpid()}"
+    try:
+        os.makedirs(tmp, exist_ok=True)
+        files = {}
+        for i, (dtype, arrays) in enumerate(blocks.items()):
+            files[dtype] = f"block_{i}.npy"
+            np.save(os.path.join(tmp, files[dtype]), np.concatenate(arrays))
+
+        with open(os.path.join(tmp, 'index.json'), 'w', encoding='utf-8') as f:
+            json.dump({'format': SNAPSHOT_FORMAT_VERSION, 'token': token, 'blocks': files, 'plants': plants}, f)
+
+        # Another process may have published the same token meanwhile; either copy is fine
+        try:
+            os.rename(tmp, target)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+        _prune(folder, keep=token)
+        return True
+
+    except Exception as e:
+        shutil.rmtree(tmp, ignore_errors=True)
+        logger.warning(f"Could not write frame snapshot: {str(e)}")
+        return False
+
+
+def attach_frame_snapshot(folder: str, token: str) -> Optional[Dict[str, pd.DataFrame]]:
+    """plant -> read-only frame viewing the mapped blocks, or None if there is no such snapshot"""
+    target = os.path.join(folder, token)
+    try:
+        with open(os.path.join(target, 'index.json'), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        if index.get('format') != SNAPSHOT_FORMAT_VERSION:
+            return None
+
+        blocks = {dtype: np.load(os.path.join(target, file), mmap_mode='r')
+                  for dtype, file in index['blocks'].items()}
+
+        def view(entry: Dict) -> np.ndarray:
+            return blocks[entry['dtype']][entry['offset']:entry['offset'] + entry['length']]
+
+        frames = {}
+        for plant in index['plants']:
+            columns = {}
+            for column in plant['columns']:
+                if 'categories' in column:
+                    columns[column['name']] = pd.Categorical.from_codes(view(column), categories=column['categories'])
+                else:
+                    columns[column['name']] = view(column)
+            df_index = pd.DatetimeIndex(view(plant['index'])) if plant['index'] else None
+            frames[plant['plant']] = pd.DataFrame(columns, index=df_index, copy=False)
+        return frames
+
+    except (OSError, ValueError, KeyError) as e:
+        if not isinstance(e, FileNotFoundError):
+            logger.warning(f"Ignoring unreadable frame snapshot {token}: {str(e)}")
+        return None
+
+
+@contextmanager
+def snapshot_lock(folder: Optional[str]):
+    """Exclusive lock shared by every process using folder, so one parses while the others wait to attach"""
+    if folder is None or fcntl is None:
+        yield
+        return
+
+    os.makedirs(folder, exist_ok=True)
+    with open(os.path.join(folder, '.lock'), 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _prune(folder: str, keep: str):
+    """Remove older snapshots; processes still mapping them keep their open files"""
+    for entry in os.listdir(folder):
+        if entry != keep and '.tmp' not in entry and not entry.startswith('.'):
+            shutil.rmtree(os.path.join(folder, entry), ignore_errors=True)
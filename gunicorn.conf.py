@@ -0,0 +1,25 @@
+"""
+Gunicorn settings - pre-fork serving of the dashboard
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+The app is not preloaded: the master binds the port and forks right away, and
+each worker loads the dataset in the background after importing wsgi. The
+plant frames are still shared, through the memory-mapped snapshot the first
+worker publishes and the others attach.
+"""
+
+import multiprocessing
+import os
+import tempfile
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5008)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+threads = int(os.environ.get('WEB_THREADS', 1))
+timeout = int(os.environ.get('WEB_TIMEOUT', 120))
+# Preloading would load the dataset in the master before the port is bound
+preload_app = False
+
+# Workers flush their metrics here so /metrics on any of them covers all of them
+if not os.environ.get('METRICS_DIR'):
+    os.environ['METRICS_DIR'] = tempfile.mkdtemp(prefix='dashboard-metrics-')
@@ -0,0 +1,87 @@
+"""
+Intent Check - accuracy and latency regression check for the intent engine
+
+    python intent_check.py [max microseconds per query]
+
+Classifies every labeled query and times IntentEngine.analyze over all of
+them. Exits non-zero on any mislabel, or when the mean time per query exceeds
+the budget (INTENT_BUDGET_US, default 200us).
+"""
+
+import os
+import sys
+import timeit
+
+from alias_matcher import AliasMatcher
+from date_parser import parse_date_range
+from intent_engine import IntentEngine
+
+# Labeled queries guarding the classifier against accuracy regressions
+LABELED_QUERIES = [
+    ('portfolio overview', 'portfolio'),
+    ('overall total', 'portfolio'),
+    ('rank all plants', 'portfolio'),
+    ('best performing plant', 'ranking'),
+    ('worst plants', 'ranking'),
+    ('lowest generation', 'ranking'),
+    ('energy generation', 'energy_query'),
+    ('how much power did we generate', 'energy_query'),
+    ('ese energy generation kwh', 'energy_query'),
+    ('ntpc and ese energy', 'comparison'),
+    ('compare ese and ntpc', 'comparison'),
+    ('ese vs ntpc', 'comparison'),
+    ('compare plants', 'comparison'),
+    ('difference between csppl and psegpl', 'comparison'),
+    ('ese performance', 'plant_analysis'),
+    ('how is ntpc doing', 'plant_analysis'),
+    ('tell me about ntpc', 'plant_analysis'),
+    ('ntpc data', 'plant_analysis'),
+    ('generation report for june 12', 'date_query'),
+    ('june 11 report', 'date_query'),
+    ('energy generation yesterday', 'date_query'),
+    ('6th june', 'date_query'),
+    ('what happened today', 'date_query'),
+    ('generation last 7 days', 'date_query'),
+    ('report for q2 2025', 'date_query'),
+    ('from march 1 to march 15', 'date_query'),
+    ('2025-06-12 generation', 'date_query'),
+    ('hello', 'general'),
+    ('help', 'general'),
+    # Substring false positives the old rules fell for
+    ('show these plants', 'general'),
+    ('the 16th', 'general'),
+    ('stop', 'general'),
+    ('may i see the portfolio', 'portfolio'),
+]
+
+# Plant aliases the labeled queries refer to
+PLANT_ALIASES = {'ese': 'ESE', 'ntpc': 'NTPC', 'csppl': 'CSPPL', 'psegpl': 'PSEGPL'}
+
+BUDGET_US = float(os.environ.get('INTENT_BUDGET_US', 200))
+
+
+def run_check(budget_us: float = BUDGET_US, runs: int = 20000) -> bool:
+    engine = IntentEngine(AliasMatcher(PLANT_ALIASES).find, parse_date_range)
+
+    failures = []
+    for query, expected in LABELED_QUERIES:
+        got = engine.analyze(query).intent
+        if got != expected:
+            failures.append((query, expected, got))
+    print(f"accuracy: {len(LABELED_QUERIES) - len(failures)}/{len(LABELED_QUERIES)}")
+    for query, expected, got in failures:
+        print(f"  {query!r}: expected {expected}, got {got}")
+
+    queries = [query for query, _ in LABELED_QUERIES]
+    repeats = max(1, runs // len(queries))
+    per_query_us = timeit.timeit(lambda: [engine.analyze(q) for q in queries],
+                                 number=repeats) / (repeats * len(queries)) * 1e6
+    too_slow = per_query_us > budget_us
+    print(f"analyze: {per_query_us:.1f}us per query (budget {budget_us:.0f}us){' - OVER BUDGET' if too_slow else ''}")
+
+    return not failures and not too_slow
+
+
+if __name__ == '__main__':
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else BUDGET_US
+    sys.exit(0 if run_check(budget) else 1)
@@ -0,0 +1,121 @@
+"""
+Intent Engine - single-pass tokenizer and intent classifier for chatbot queries
+
+Queries are split once; each word is checked against a precompiled filler set
+and a keyword index, so keywords match whole tokens ("overall" no longer
+contains "all", "16th" no longer contains "6th"). Intents are then resolved by
+the same priority order the chatbot has always used.
+"""
+
+import re
+from collections import namedtuple
+from typing import Callable, Dict, FrozenSet, List, Optional
+
+FILLER_WORDS = frozenset(['tell', 'me', 'about', 'the', 'a', 'an', 'is', 'are', 'was', 'were',
+                          'what', 'how', 'can', 'you', 'please'])
+
+# Keyword groups; a token may count towards several groups
+KEYWORDS: Dict[str, FrozenSet[str]] = {
+    'detail': frozenset(['performance', 'doing', 'stats', 'information', 'info', 'data']),
+    'comparison': frozenset(['compare', 'compared', 'comparing', 'comparison', 'vs', 'versus',
+                             'difference', 'between']),
+    # Months, ordinals and ranges are left to the date parser, which knows "may i" is no date
+    'date': frozenset(['yesterday', 'today']),
+    'top': frozenset(['best', 'top', 'most', 'highest']),
+    'bottom': frozenset(['worst', 'bottom', 'least', 'lowest']),
+    'energy': frozenset(['energy', 'power', 'generation', 'generated', 'kwh']),
+    'portfolio': frozenset(['portfolio', 'all', 'total', 'overall']),
+}
+
+# token -> groups it belongs to
+KEYWORD_INDEX: Dict[str, FrozenSet[str]] = {}
+for _group, _words in KEYWORDS.items():
+    for _word in _words:
+        KEYWORD_INDEX[_word] = KEYWORD_INDEX.get(_word, frozenset()) | {_group}
+
+# (intent, keyword groups that trigger it, plant-count condition), first match wins
+INTENT_RULES = [
+    ('plant_analysis', frozenset(['detail']), lambda n: n == 1),
+    ('comparison', None, lambda n: n >= 2),
+    ('comparison', frozenset(['comparison']), None),
+    ('date_query', frozenset(['date']), None),
+    ('ranking', frozenset(['top', 'bottom']), None),
+    ('energy_query', frozenset(['energy']), None),
+    ('portfolio', frozenset(['portfolio']), None),
+    ('plant_analysis', None, lambda n: n >= 1),
+]
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+QueryAnalysis = namedtuple('QueryAnalysis', ['query', 'tokens', 'intent', 'plants', 'ranking', 'date_terms',
+                                             'date_range'])
+
+
+def ranking_direction(groups) -> Optional[str]:
+    """'top', 'bottom' or None (full ranking) from the keyword groups of a query"""
+    if 'top' in groups:
+        return 'top'
+    if 'bottom' in groups:
+        return 'bottom'
+    return None
+
+
+class IntentEngine:
+    def __init__(self, plant_matcher: Callable[[str], List[str]], date_parser: Optional[Callable] = None):
+        self.plant_matcher = plant_matcher
+        # Optional query -> DateRange (or None); a parsed range also counts as a date mention
+        self.date_parser = date_parser
+
+    def clean(self, query: str) -> str:
+        """Lowercased query without filler words"""
+        return ' '.join(word for word in query.lower().split() if word not in FILLER_WORDS)
+
+    def analyze(self, user_query: str, timer=None) -> QueryAnalysis:
+        """Tokenize, match plants, parse dates and classify; timer (a metrics.StageTimer) gets a lap per step"""
+        kept, tokens, date_terms = [], [], []
+        groups = set()
+        for word in user_query.lower().split():
+            if word in FILLER_WORDS:
+                continue
+            kept.append(word)
+            for token in _TOKEN_RE.findall(word):
+                tokens.append(token)
+                found = KEYWORD_INDEX.get(token)
+                if found:
+                    groups |= found
+                    if 'date' in found:
+                        date_terms.append(token)
+
+        query = ' '.join(kept)
+        if timer:
+            timer.lap('tokenize')
+        plants = self.plant_matcher(query)
+        if timer:
+            timer.lap('plant_match')
+        date_range = self.date_parser(query) if self.date_parser else None
+        if date_range is not None:
+            groups.add('date')
+        if timer:
+            timer.lap('date_parse')
+        intent = self.classify(groups, len(plants))
+        if timer:
+            timer.lap('classify')
+        return QueryAnalysis(query, tuple(tokens), intent, plants, ranking_direction(groups), tuple(date_terms),
+                             date_range)
+
+    def classify(self, groups, n_plants: int) -> str:
+        for intent, required, plant_condition in INTENT_RULES:
+            if required is not None and required.isdisjoint(groups):
+                continue
+            if plant_condition is not None and not plant_condition(n_plants):
+                continue
+            return intent
+        return 'general'
+
+    def keyword_groups(self, query: str) -> FrozenSet[str]:
+        """Keyword groups present in an already cleaned query"""
+        groups = set()
+        for token in _TOKEN_RE.findall(query.lower()):
+            groups |= KEYWORD_INDEX.get(token, frozenset())
+        return frozenset(groups)
+
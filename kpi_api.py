@@ -0,0 +1,214 @@
+"""
+KPI API - JSON endpoints over the loaded dataset
+
+    GET /api/plants                      plant list with record counts and date ranges
+    GET /api/plants/<plant>              full-history KPIs, or ?start=&end= / ?period= for a range
+    GET /api/rankings                    ?metric=export|availability|performance_ratio|capacity_utilization
+                                         &order=desc|asc&limit=N, optionally over a range
+    GET /api/range                       per-plant and portfolio totals over ?start=&end= or ?period=
+
+Every response carries a strong ETag built from the dataset content token and
+the request URL, so a client polling with If-None-Match gets a 304 without the
+body being computed until the workbooks change.
+"""
+
+import hashlib
+import math
+import os
+from datetime import date
+from typing import Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+from flask import Blueprint, Response, jsonify, request
+
+from clean_fixed_processor import SUMMARY_METRICS
+from date_parser import parse_date_range
+from web_assets import accepted_encoding, encode_response, encoded_etag, etag_matches
+
+# Seconds clients may reuse a response before revalidating; 0 means always revalidate
+API_MAX_AGE = int(os.environ.get('API_MAX_AGE', 0))
+
+
+class ApiError(Exception):
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def _json_value(value):
+    """numpy/pandas scalars -> JSON-safe Python values, NaN -> None"""
+    if isinstance(value, (pd.Timestamp, date)):
+        return value.strftime('%Y-%m-%d')
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def _date_param(name: str) -> Optional[date]:
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ApiError(f"{name} must be a YYYY-MM-DD date")
+
+
+def _requested_range(processor, required: bool = False):
+    """(start, end, time relative) from ?period= or ?start=&end=; (None, None, False) if neither"""
+    period = request.args.get('period')
+    if period:
+        today = date.today()
+        anchor = today
+        last_day = processor.get_cube().last_reading_day()
+        if last_day is not None:
+            anchor = min(pd.Timestamp(last_day).date(), today)
+        parsed = parse_date_range(period, today, anchor)
+        if parsed is None:
+            raise ApiError(f"Could not understand period '{period}'")
+        return parsed.start, parsed.end, parsed.relative
+
+    start, end = _date_param('start'), _date_param('end')
+    if required and not (start or end):
+        raise ApiError("Give a period, or a start and/or end date")
+    if start and end and start > end:
+        raise ApiError("start must not be after end")
+    return start, end, False
+
+
+def _range_kpis(processor, start, end, plants=None) -> Dict[str, Dict]:
+    """plant -> records, export total and metric means over [start, end] from the prefix-sum cube"""
+    counts = processor.range_count(start, end, plants=plants)
+    totals = processor.range_sum(start, end, plants=plants)
+    means = {key: processor.range_mean(start, end, column, plants=plants)
+             for key, column in SUMMARY_METRICS.items()}
+
+    result = {}
+    for plant, records in counts.items():
+        kpis = {'records': records, 'export_total': totals[plant] if records else None}
+        for key in SUMMARY_METRICS:
+            kpis[f'{key}_mean'] = means[key][plant]
+        result[plant] = {k: _json_value(v) for k, v in kpis.items()}
+    return result
+
+
+def create_kpi_api(get_processor: Callable, get_status: Callable[[], Dict]) -> Blueprint:
+    """Blueprint over get_processor(), which returns None until the dataset is loaded"""
+    api = Blueprint('kpi_api', __name__, url_prefix='/api')
+
+    def respond(build: Callable[[object], Dict]):
+        processor = get_processor()
+        if processor is None:
+            response = jsonify({'error': 'warming up', 'status': get_status()})
+            response.headers['Retry-After'] = '5'
+            return response, 503
+
+        with processor.pinned() as dataset:
+            # Same workbooks -> same token in every worker, so the tag survives load balancing
+            try:
+                relative = _requested_range(processor)[2]
+            except ApiError:
+                relative = False
+            key = f"{dataset.token}|{request.full_path}|{date.today() if relative else ''}"
+            etag = hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]
+            # Chosen up front so a 304 repeats the tag of the representation a 200 would carry
+            encoding = accepted_encoding()
+
+            if etag_matches(etag, encoding):
+                response = Response(status=304)
+                response.vary.add('Accept-Encoding')
+            else:
+                try:
+                    body = build(processor)
+                except ApiError as e:
+                    return jsonify({'error': str(e)}), e.status
+                body['dataset'] = dataset.token
+                # Compressed here whatever its size, so the tag never depends on the body
+                response = encode_response(jsonify(body), encoding)
+
+        response.set_etag(encoded_etag(etag, encoding))
+        response.headers['Cache-Control'] = (f'public, max-age={API_MAX_AGE}, must-revalidate'
+                                             if API_MAX_AGE > 0 else 'no-cache')
+        return response
+
+    @api.route('/plants')
+    def plants():
+        def build(processor):
+            summaries = processor.get_plant_summaries()
+            return {'plants': [
+                {'name': plant, 'records': _json_value(summary['records']),
+                 'start_date': _json_value(summary['start_date']), 'end_date': _json_value(summary['end_date'])}
+                for plant, summary in summaries.items()
+            ]}
+        return respond(build)
+
+    @api.route('/plants/<plant_name>')
+    def plant_kpis(plant_name):
+        def build(processor):
+            summary = processor.get_plant_summary(plant_name)
+            if summary is None:
+                raise ApiError(f"Unknown plant '{plant_name}'", 404)
+
+            start, end, _ = _requested_range(processor)
+            if start is None and end is None:
+                return {'plant': plant_name, 'kpis': {k: _json_value(v) for k, v in summary.items()}}
+
+            kpis = _range_kpis(processor, start, end, [plant_name]).get(plant_name, {})
+            return {'plant': plant_name, 'start': _json_value(start), 'end': _json_value(end), 'kpis': kpis}
+        return respond(build)
+
+    @api.route('/rankings')
+    def rankings():
+        def build(processor):
+            metric = request.args.get('metric', 'export')
+            if metric not in SUMMARY_METRICS:
+                raise ApiError(f"metric must be one of {', '.join(SUMMARY_METRICS)}")
+            order = request.args.get('order', 'desc')
+            if order not in ('asc', 'desc'):
+                raise ApiError("order must be asc or desc")
+            try:
+                limit = int(request.args['limit']) if 'limit' in request.args else None
+            except ValueError:
+                raise ApiError("limit must be a positive integer")
+            if limit is not None and limit < 1:
+                raise ApiError("limit must be a positive integer")
+
+            field = 'export_total' if metric == 'export' else f'{metric}_mean'
+            start, end, _ = _requested_range(processor)
+            if start is None and end is None:
+                values = {plant: _json_value(summary[field])
+                          for plant, summary in processor.get_plant_summaries().items()}
+            else:
+                values = {plant: kpis[field] for plant, kpis in _range_kpis(processor, start, end).items()}
+
+            ranked = sorted(((plant, value) for plant, value in values.items() if value is not None),
+                            key=lambda item: item[1], reverse=order == 'desc')[:limit]
+            return {
+                'metric': metric, 'field': field, 'order': order,
+                'start': _json_value(start), 'end': _json_value(end),
+                'rankings': [{'rank': i, 'plant': plant, 'value': value}
+                             for i, (plant, value) in enumerate(ranked, 1)]
+            }
+        return respond(build)
+
+    @api.route('/range')
+    def date_range():
+        def build(processor):
+            start, end, _ = _requested_range(processor, required=True)
+            plants = request.args.get('plants')
+            kpis = _range_kpis(processor, start, end, plants.split(',') if plants else None)
+            active = {plant: values for plant, values in kpis.items() if values['records']}
+            return {
+                'start': _json_value(start), 'end': _json_value(end),
+                'portfolio': {
+                    'plants_with_data': len(active),
+                    'export_total': sum(values['export_total'] or 0 for values in active.values())
+                },
+                'plants': kpis
+            }
+        return respond(build)
+
+    return api
@@ -0,0 +1,157 @@
+"""
+KPI Cube - dense plant x day x metric arrays with prefix sums
+
+Any date-range sum, count or mean for any set of plants is two lookups in
+the cumulative arrays, independent of how many days the range covers.
+"""
+
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Metrics stored in the cube unless the caller asks for others
+CUBE_METRICS = ['Mtr_Export (kWh)', 'PA(%)', 'PR(%)', 'CUF(%)']
+
+# Rows dated outside [CUBE_MIN_DAY, today + CUBE_MAX_FUTURE_DAYS] are left out, so one
+# mistyped year cannot blow the dense day axis up to centuries
+CUBE_MIN_DAY = np.datetime64('2000-01-01')
+CUBE_MAX_FUTURE_DAYS = 3 * 366
+
+
+class KPICube:
+    def __init__(self, plants: List[str], metrics: List[str], first_day: Optional[np.datetime64],
+                 day_sums: np.ndarray, day_counts: np.ndarray):
+        self.plants = list(plants)
+        self.metrics = list(metrics)
+        self.first_day = first_day
+        self.n_days = day_sums.shape[1]
+        self._plant_pos = {plant: i for i, plant in enumerate(self.plants)}
+        self._metric_pos = {metric: i for i, metric in enumerate(self.metrics)}
+
+        # Prefix sums with a leading zero day: range [a, b] is cum[:, b + 1] - cum[:, a]
+        shape = (len(self.plants), self.n_days + 1, len(self.metrics))
+        self._cum_sums = np.zeros(shape, dtype=np.float64)
+        self._cum_counts = np.zeros(shape, dtype=np.int64)
+        np.cumsum(day_sums, axis=1, out=self._cum_sums[:, 1:])
+        np.cumsum(day_counts, axis=1, out=self._cum_counts[:, 1:])
+
+    @classmethod
+    def from_frames(cls, frames: Iterable[Tuple[str, pd.DataFrame]], metrics: Optional[List[str]] = None) -> 'KPICube':
+        """Build from (plant, frame) pairs; frames need a Date column, missing metrics stay NaN"""
+        metrics = list(metrics or CUBE_METRICS)
+        plants, codes, dates, values = [], [], [], []
+        for plant_name, df in frames:
+            if df is None or df.empty or 'Date' not in df.columns:
+                continue
+            plants.append(plant_name)
+            codes.append(np.full(len(df), len(plants) - 1, dtype=np.int64))
+            dates.append(df['Date'].to_numpy().astype('datetime64[D]'))
+            values.append(np.column_stack([
+                pd.to_numeric(df[metric], errors='coerce').to_numpy(dtype=np.float64)
+                if metric in df.columns else np.full(len(df), np.nan)
+                for metric in metrics
+            ]))
+
+        if not plants:
+            return cls([], metrics, None, np.zeros((0, 0, len(metrics))), np.zeros((0, 0, len(metrics)), dtype=np.int64))
+
+        return cls.from_arrays(plants, metrics, np.concatenate(codes), np.concatenate(dates),
+                               np.concatenate(values))
+
+    @classmethod
+    def from_arrays(cls, plants: List[str], metrics: List[str], codes: np.ndarray, dates: np.ndarray,
+                    values: np.ndarray) -> 'KPICube':
+        """Build from long-format arrays: plant code, date and one values column per metric"""
+        days = dates.astype('datetime64[D]')
+        valid = ~np.isnat(days)
+        latest = np.datetime64(pd.Timestamp.today().date()) + np.timedelta64(CUBE_MAX_FUTURE_DAYS, 'D')
+        in_window = valid & (days >= CUBE_MIN_DAY) & (days <= latest)
+        if (valid & ~in_window).any():
+            logger.warning(f"KPI cube skips {int((valid & ~in_window).sum())} rows dated outside "
+                           f"{CUBE_MIN_DAY} to {latest}")
+        valid = in_window
+        codes, days, values = codes[valid].astype(np.int64), days[valid], values[valid]
+
+        if len(days) == 0:
+            shape = (len(plants), 0, len(metrics))
+            return cls(plants, metrics, None, np.zeros(shape), np.zeros(shape, dtype=np.int64))
+
+        first_day = days.min()
+        n_days = int((days.max() - first_day).astype(int)) + 1
+        cells = codes * n_days + (days - first_day).astype(np.int64)
+        size = len(plants) * n_days
+
+        # Several rows on one day are summed and counted, so means stay per-row means
+        day_sums = np.empty((len(plants), n_days, len(metrics)))
+        day_counts = np.empty((len(plants), n_days, len(metrics)), dtype=np.int64)
+        for m in range(len(metrics)):
+            column = values[:, m]
+            present = ~np.isnan(column)
+            day_sums[:, :, m] = np.bincount(cells[present], weights=column[present], minlength=size).reshape(len(plants), n_days)
+            day_counts[:, :, m] = np.bincount(cells[present], minlength=size).reshape(len(plants), n_days)
+
+        return cls(plants, metrics, first_day, day_sums, day_counts)
+
+    def _day_bounds(self, start_date, end_date) -> Tuple[int, int]:
+        """Inclusive date range -> half-open day positions, clipped to the cube"""
+        if self.first_day is None:
+            return 0, 0
+        start = 0 if start_date is None else int((np.datetime64(pd.Timestamp(start_date).date()) - self.first_day).astype(int))
+        end = self.n_days - 1 if end_date is None else int((np.datetime64(pd.Timestamp(end_date).date()) - self.first_day).astype(int))
+        start, end = max(start, 0), min(end, self.n_days - 1)
+        return (start, end + 1) if start <= end else (0, 0)
+
+    def _plant_rows(self, plants: Optional[Iterable[str]]) -> Tuple[List[str], List[int]]:
+        if plants is None:
+            return self.plants, list(range(len(self.plants)))
+        names = [p for p in plants if p in self._plant_pos]
+        return names, [self._plant_pos[p] for p in names]
+
+    def _range(self, cumulative: np.ndarray, start_date, end_date, metric: str, plants) -> Tuple[List[str], np.ndarray]:
+        names, rows = self._plant_rows(plants)
+        start, end = self._day_bounds(start_date, end_date)
+        m = self._metric_pos[metric]
+        return names, cumulative[rows, end, m] - cumulative[rows, start, m]
+
+    def range_sum(self, start_date, end_date, metric: str = 'Mtr_Export (kWh)',
+                  plants: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        """plant -> sum of metric over [start_date, end_date]; None bounds mean open-ended"""
+        names, sums = self._range(self._cum_sums, start_date, end_date, metric, plants)
+        return dict(zip(names, sums.tolist()))
+
+    def range_count(self, start_date, end_date, metric: str = 'Mtr_Export (kWh)',
+                    plants: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """plant -> number of non-missing readings of metric over the range"""
+        names, counts = self._range(self._cum_counts, start_date, end_date, metric, plants)
+        return dict(zip(names, counts.tolist()))
+
+    def range_mean(self, start_date, end_date, metric: str = 'PA(%)',
+                   plants: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        """plant -> mean of metric over the range, NaN where the plant has no readings"""
+        names, sums = self._range(self._cum_sums, start_date, end_date, metric, plants)
+        _, counts = self._range(self._cum_counts, start_date, end_date, metric, plants)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+        return dict(zip(names, means.tolist()))
+
+    def portfolio_sum(self, start_date, end_date, metric: str = 'Mtr_Export (kWh)') -> float:
+        return float(sum(self.range_sum(start_date, end_date, metric).values()))
+
+    @property
+    def last_day(self) -> Optional[np.datetime64]:
+        if self.first_day is None:
+            return None
+        return self.first_day + np.timedelta64(self.n_days - 1, 'D')
+
+    def last_reading_day(self, metric: str = 'Mtr_Export (kWh)') -> Optional[np.datetime64]:
+        """Last day any plant has a positive reading of metric; trailing blank or zero template rows are ignored"""
+        if self.first_day is None or metric not in self._metric_pos:
+            return None
+        # Daily sums per plant from the prefix sums; the last positive one is the last day with data
+        day_sums = np.diff(self._cum_sums[:, :, self._metric_pos[metric]], axis=1)
+        days = np.flatnonzero((day_sums > 0).any(axis=0))
+        return self.first_day + np.timedelta64(int(days[-1]), 'D') if len(days) else None
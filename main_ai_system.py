@@ -5,16 +5,29 @@ Perfect formatting for web display
 """
 
 import pandas as pd
+import os
 import re
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
 import logging
 
+from alias_matcher import AliasMatcher
 from clean_fixed_processor import DataProcessor
+from date_parser import DateRange, parse_date_range
+from intent_engine import IntentEngine, ranking_direction
+from metrics import CHAT_REPORT_SECONDS, CHAT_STAGE_SECONDS, StageTimer, plant_count_label
+from response_cache import ResponseCache
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Lines per chunk when long reports are streamed
+STREAM_BLOCK_LINES = 25
+
 class CleanChatbot:
     """
     Clean chatbot with perfect web formatting
@@ -24,6 +37,12 @@ class CleanChatbot:
         self.data_processor = None
         self.is_initialized = False
         self.plant_aliases = {}
+        self._plant_alias_lists = {}
+        self._alias_matcher = AliasMatcher({})
+        self.intent_engine = IntentEngine(self._find_plants_in_query, self._extract_date_range_from_query)
+        self.response_cache = ResponseCache()
+        # Aggregates shared by the queries of one process_queries batch, per thread
+        self._batch = threading.local()
         
         logger.info("Clean Chatbot initialized")
     
@@ -47,22 +66,55 @@ class CleanChatbot:
             logger.error(f"Failed to initialize: {str(e)}")
             return False
     
-    def _setup_plant_aliases(self):
+    def load_progress(self) -> Dict:
+        """Initial load progress, for readiness checks while initialize_system runs"""
+        if self.data_processor is None:
+            return {'state': 'starting', 'loaded': 0, 'total': 0, 'elapsed_seconds': 0.0}
+        return self.data_processor.load_progress()
+    
+    def start_hot_reload(self, interval: float = 60):
+        """Pick up added, changed and removed workbooks without a restart"""
+        if self.data_processor:
+            self.data_processor.start_watcher(interval, on_swap=self._on_dataset_swap)
+    
+    def _on_dataset_swap(self, old_dataset, new_dataset, changes):
+        self._setup_plant_aliases(new_dataset.get_available_plants())
+        # Entries are version-tagged anyway; dropping them frees the memory right away
+        self.response_cache.clear()
+        logger.info(f"Plant aliases updated: +{len(changes['added'])} -{len(changes['removed'])} plants")
+    
+    def _setup_plant_aliases(self, all_plants: Optional[List[str]] = None):
         """Setup plant name aliases for flexible matching"""
-        all_plants = self.data_processor.get_available_plants()
+        if all_plants is None:
+            all_plants = self.data_processor.get_available_plants()
+        
+        # Only plants we have not seen before need their aliases derived
+        alias_lists = {plant: self._plant_alias_lists.get(plant) or self._derive_plant_aliases(plant)
+                       for plant in all_plants}
         
+        aliases = {}
         for plant in all_plants:
-            self.plant_aliases[plant.lower()] = plant
-            
-            parts = plant.split('_')
-            for part in parts:
-                if len(part) > 2:
-                    self.plant_aliases[part.lower()] = plant
-            
-            self.plant_aliases[plant.replace('_', '').lower()] = plant
-            clean_name = re.sub(r'\d+', '', plant).replace('_', '').lower()
-            if clean_name:
-                self.plant_aliases[clean_name] = plant
+            for alias in alias_lists[plant]:
+                aliases[alias] = plant
+        
+        # Swap whole tables so concurrent lookups never see a half-built one
+        self._plant_alias_lists = alias_lists
+        self.plant_aliases = aliases
+        self._alias_matcher = AliasMatcher(aliases)
+    
+    def _derive_plant_aliases(self, plant: str) -> List[str]:
+        aliases = [plant.lower()]
+        
+        parts = plant.split('_')
+        for part in parts:
+            if len(part) > 2:
+                aliases.append(part.lower())
+        
+        aliases.append(plant.replace('_', '').lower())
+        clean_name = re.sub(r'\d+', '', plant).replace('_', '').lower()
+        if clean_name:
+            aliases.append(clean_name)
+        return aliases
     
     def process_query(self, user_query: str) -> str:
         """Process query with clean formatting"""
@@ -71,79 +123,243 @@ class CleanChatbot:
             return "❌ System not initialized. Please restart the server."
         
         try:
-            query = user_query.lower().strip()
-            query = self._clean_query(query)
-            mentioned_plants = self._find_plants_in_query(query)
-            intent = self._detect_intent(query, mentioned_plants)
-            
-            return self._generate_clean_response(intent, query, mentioned_plants, user_query)
+            timer = StageTimer()
+            # Answer from one dataset version even if a hot reload lands mid-request
+            with self.data_processor.pinned() as dataset:
+                analysis = self.intent_engine.analyze(user_query, timer)
+                query, mentioned_plants, intent = analysis.query, analysis.plants, analysis.intent
+                
+                cache_key = self._cache_key(analysis, user_query)
+                response = self.response_cache.get(cache_key, dataset.version)
+                timer.lap('cache_lookup')
+                if response is None:
+                    response = self._generate_clean_response(intent, query, mentioned_plants, user_query, analysis)
+                    timer.lap('render')
+                    self.response_cache.put(cache_key, dataset.version, response, self._time_relative(analysis))
+                    timer.lap('cache_store')
+                
+                timer.record(CHAT_STAGE_SECONDS, intent, plant_count_label(len(mentioned_plants)))
+                return response
             
         except Exception as e:
             logger.error(f"Error processing query: {str(e)}")
             return "❌ Unable to process request. Please try rephrasing your query."
     
+    def stream_query(self, user_query: str) -> Iterator[str]:
+        """process_query as a generator: report sections are yielded as soon as they are formatted"""
+        
+        if not self.is_initialized:
+            yield "❌ System not initialized. Please restart the server."
+            return
+        
+        dataset = self.data_processor.snapshot()
+        chunks = []
+        timer = StageTimer()
+        try:
+            with self.data_processor.pinned(dataset):
+                analysis = self.intent_engine.analyze(user_query, timer)
+                cache_key = self._cache_key(analysis, user_query)
+                cached = self.response_cache.get(cache_key, dataset.version)
+            timer.lap('cache_lookup')
+            labels = (analysis.intent, plant_count_label(len(analysis.plants)))
+            
+            if cached is not None:
+                timer.record(CHAT_STAGE_SECONDS, *labels)
+                yield cached
+                return
+            
+            report = self._streamed_report(analysis.intent, analysis.plants)
+            sections = self._stream_clean_response(analysis.intent, analysis.query, analysis.plants, user_query, analysis)
+            while True:
+                # Only time spent producing chunks counts, not the client reading them
+                timer.skip()
+                # Pin per step: other work may run on this thread between two chunks
+                with self.data_processor.pinned(dataset):
+                    chunk = next(sections, None)
+                timer.lap('render')
+                if chunk is None:
+                    break
+                chunks.append(chunk)
+                yield chunk
+            
+        except Exception as e:
+            logger.error(f"Error streaming query: {str(e)}")
+            yield "❌ Unable to process request. Please try rephrasing your query."
+            return
+        
+        if report:
+            CHAT_REPORT_SECONDS.observe(timer.stages['render'], report, *labels)
+        self.response_cache.put(cache_key, dataset.version, ''.join(chunks), self._time_relative(analysis))
+        timer.lap('cache_store')
+        timer.record(CHAT_STAGE_SECONDS, *labels)
+    
+    def process_queries(self, user_queries: List[str], max_workers: Optional[int] = None) -> List[str]:
+        """Answer many queries against one dataset version, in input order.
+        
+        Identical queries are answered once, the aggregates they share (plant energy
+        totals, per-period totals) are computed once up front, and the remaining
+        rendering fans out over a thread pool.
+        """
+        if not self.is_initialized:
+            return ["❌ System not initialized. Please restart the server."] * len(user_queries)
+        
+        dataset = self.data_processor.snapshot()
+        responses = [None] * len(user_queries)
+        pending = {}  # cache key -> (analysis, user query, positions, stage timer)
+        
+        with self.data_processor.pinned(dataset):
+            for i, user_query in enumerate(user_queries):
+                timer = StageTimer()
+                try:
+                    analysis = self.intent_engine.analyze(user_query, timer)
+                except Exception as e:
+                    logger.error(f"Error processing query: {str(e)}")
+                    responses[i] = "❌ Unable to process request. Please try rephrasing your query."
+                    continue
+                
+                cache_key = self._cache_key(analysis, user_query)
+                labels = (analysis.intent, plant_count_label(len(analysis.plants)))
+                if cache_key in pending:
+                    pending[cache_key][2].append(i)
+                    timer.lap('cache_lookup')
+                    timer.record(CHAT_STAGE_SECONDS, *labels)
+                    continue
+                cached = self.response_cache.get(cache_key, dataset.version)
+                timer.lap('cache_lookup')
+                if cached is not None:
+                    responses[i] = cached
+                    timer.record(CHAT_STAGE_SECONDS, *labels)
+                else:
+                    pending[cache_key] = (analysis, user_query, [i], timer)
+            
+            shared = self._shared_aggregates([analysis for analysis, _, _, _ in pending.values()])
+        
+        def answer(item):
+            cache_key, (analysis, user_query, _, timer) = item
+            # Waiting for the rest of the batch and a pool thread is not part of this query
+            timer.skip()
+            try:
+                with self.data_processor.pinned(dataset), self._batch_scope(shared):
+                    response = self._generate_clean_response(analysis.intent, analysis.query, analysis.plants,
+                                                             user_query, analysis)
+            except Exception as e:
+                logger.error(f"Error processing query: {str(e)}")
+                return "❌ Unable to process request. Please try rephrasing your query."
+            timer.lap('render')
+            self.response_cache.put(cache_key, dataset.version, response, self._time_relative(analysis))
+            timer.lap('cache_store')
+            timer.record(CHAT_STAGE_SECONDS, analysis.intent, plant_count_label(len(analysis.plants)))
+            return response
+        
+        items = list(pending.items())
+        if items:
+            workers = max(1, min(len(items), max_workers or os.cpu_count() or 1))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for (_, (_, _, positions, _)), response in zip(items, executor.map(answer, items)):
+                    for i in positions:
+                        responses[i] = response
+        
+        return responses
+    
+    def _shared_aggregates(self, analyses) -> Dict:
+        """Compute once what several queries of a batch would each compute"""
+        shared = {}
+        intents = {analysis.intent for analysis in analyses}
+        if intents & {'ranking', 'portfolio', 'energy_query', 'comparison'}:
+            shared['energy_totals'] = tuple(self._plant_energy_totals())
+        
+        for analysis in analyses:
+            date_range = analysis.date_range
+            if analysis.intent == 'date_query' and date_range and ('period', date_range.start, date_range.end) not in shared:
+                shared[('period', date_range.start, date_range.end)] = self._period_totals(date_range.start, date_range.end)
+        return shared
+    
+    @contextmanager
+    def _batch_scope(self, shared: Dict):
+        previous = getattr(self._batch, 'shared', None)
+        self._batch.shared = shared
+        try:
+            yield
+        finally:
+            self._batch.shared = previous
+    
+    def _shared(self, key):
+        shared = getattr(self._batch, 'shared', None)
+        return shared.get(key) if shared else None
+    
+    def _cache_key(self, analysis, user_query: str) -> tuple:
+        cache_key = (analysis.query, tuple(analysis.plants), analysis.intent)
+        if analysis.intent == 'comparison' and len(analysis.plants) < 2:
+            # The fallback plant match reads the raw words, filler included
+            cache_key += (user_query.lower().strip(),)
+        return cache_key
+    
+    def _time_relative(self, analysis) -> bool:
+        """Whether the answer depends on today's date ("yesterday", "last 7 days", ...), as the date parser saw it"""
+        return analysis.date_range is not None and analysis.date_range.relative
+    
+    def cache_stats(self) -> Dict:
+        """Hit/miss counters and size of the response cache"""
+        return self.response_cache.stats()
+    
     def _clean_query(self, query: str) -> str:
         """Remove filler words"""
-        filler_words = ['tell', 'me', 'about', 'the', 'a', 'an', 'is', 'are', 'was', 'were', 'what', 'how', 'can', 'you', 'please']
-        words = query.split()
-        cleaned_words = [word for word in words if word not in filler_words]
-        return ' '.join(cleaned_words)
+        return self.intent_engine.clean(query)
     
     def _find_plants_in_query(self, query: str) -> List[str]:
-        """Find plant names in query using aliases"""
-        found_plants = []
-        
-        for alias, plant_name in self.plant_aliases.items():
-            if alias in query:
-                if plant_name not in found_plants:
-                    found_plants.append(plant_name)
-        
-        return found_plants
+        """Find plant names in query using aliases, in the order they are mentioned"""
+        return self._alias_matcher.find(query)
     
     def _detect_intent(self, query: str, plants: List[str]) -> str:
         """Detect user intent"""
-        
-        if plants and len(plants) == 1:
-            if any(word in query for word in ['performance', 'doing', 'stats', 'information', 'data']):
-                return 'plant_analysis'
-        
-        if len(plants) >= 2 or any(word in query for word in ['compare', 'vs', 'versus', 'difference', 'between']):
-            return 'comparison'
-        
-        if any(word in query for word in ['june', 'july', 'may', 'april', 'yesterday', 'today', '12th', '11th', '6th']):
-            return 'date_query'
-        
-        if any(word in query for word in ['best', 'worst', 'top', 'bottom', 'most', 'least', 'highest', 'lowest']):
-            return 'ranking'
-        
-        if any(word in query for word in ['energy', 'power', 'generation', 'kwh']):
-            return 'energy_query'
-        
-        if any(word in query for word in ['portfolio', 'all', 'total', 'overall']):
-            return 'portfolio'
-        
-        if plants:
-            return 'plant_analysis'
-        
-        return 'general'
+        return self.intent_engine.classify(self.intent_engine.keyword_groups(query), len(plants))
     
-    def _generate_clean_response(self, intent: str, query: str, plants: List[str], original_query: str) -> str:
+    def _generate_clean_response(self, intent: str, query: str, plants: List[str], original_query: str,
+                                 analysis=None) -> str:
         """Generate clean responses"""
+        ranking = analysis.ranking if analysis else None
+        date_range = analysis.date_range if analysis else None
+        start = time.perf_counter()
         
         if intent == 'plant_analysis':
-            return self._create_plant_analysis(plants[0] if plants else None, original_query)
+            report, response = 'plant_analysis', self._create_plant_analysis(plants[0] if plants else None, original_query)
         elif intent == 'comparison':
-            return self._create_comparison_analysis(plants, original_query)
+            report, response = 'comparison_analysis', self._create_comparison_analysis(plants, original_query)
         elif intent == 'date_query':
-            return self._create_date_analysis(query, original_query)
+            report, response = 'date_analysis', self._create_date_analysis(query, original_query, date_range)
         elif intent == 'ranking':
-            return self._create_ranking_analysis(query, original_query)
+            report, response = 'ranking_analysis', self._create_ranking_analysis(query, original_query, ranking)
         elif intent == 'energy_query':
-            return self._create_energy_analysis(plants, original_query)
+            report, response = 'energy_analysis', self._create_energy_analysis(plants, original_query)
         elif intent == 'portfolio':
-            return self._create_portfolio_analysis(original_query)
+            report, response = 'portfolio_analysis', self._create_portfolio_analysis(original_query)
         else:
-            return self._create_help_message(original_query)
+            report, response = 'help_message', self._create_help_message(original_query)
+        
+        CHAT_REPORT_SECONDS.observe(time.perf_counter() - start, report, intent, plant_count_label(len(plants)))
+        return response
+    
+    def _stream_clean_response(self, intent: str, query: str, plants: List[str], original_query: str,
+                               analysis=None) -> Iterator[str]:
+        """Yield the response in sections; long reports flush their header before the heavy part"""
+        
+        report = self._streamed_report(intent, plants)
+        if report == 'ranking_analysis':
+            yield from self._stream_ranking_analysis(query, original_query, analysis.ranking if analysis else None)
+        elif report:
+            yield from self._stream_portfolio_analysis(original_query)
+        else:
+            yield self._generate_clean_response(intent, query, plants, original_query, analysis)
+    
+    def _streamed_report(self, intent: str, plants: List[str]) -> Optional[str]:
+        """Report rendered section by section for intent, or None when it is rendered whole (and timed there)"""
+        if intent == 'ranking':
+            return 'ranking_analysis'
+        if intent == 'portfolio':
+            return 'portfolio_analysis'
+        if intent == 'energy_query' and not plants:
+            return 'energy_analysis'
+        return None
     
     def _create_plant_analysis(self, plant_name: str, original_query: str) -> str:
         """Create clean plant analysis"""
@@ -246,97 +462,95 @@ Example: 'Analyze AXPPL performance'"""
                     found_plants.append(plant)
             
             if len(found_plants) >= 2:
-                plants = found_plants[:2]
+                plants = found_plants
             else:
                 return """💡 Comparison requires at least two plant names.
 
 Example: 'Compare CSPPL and PSEGPL performance'"""
         
-        plant1, plant2 = plants[0], plants[1]
+        plants = list(dict.fromkeys(plants))
         
         # Clean header
         response = f"⚖️ PLANT COMPARISON\n"
-        response += f"{plant1.upper()} vs {plant2.upper()}\n"
+        response += " vs ".join(plant.upper() for plant in plants) + "\n"
         response += "═" * 50 + "\n\n"
         
-        # Get data for both plants
-        data1 = self.data_processor.get_plant_data(plant1)
-        data2 = self.data_processor.get_plant_data(plant2)
-        
-        if data1 is None or data1.empty:
-            return f"❌ No data available for {plant1}"
-        if data2 is None or data2.empty:
-            return f"❌ No data available for {plant2}"
+        # Every compared plant comes from the materialized summaries, not its frame
+        summaries = self.data_processor.get_plant_summaries()
+        for plant in plants:
+            if plant not in summaries:
+                return f"❌ No data available for {plant}"
         
         # Energy generation comparison
-        if 'Mtr_Export (kWh)' in data1.columns and 'Mtr_Export (kWh)' in data2.columns:
-            energy1 = data1['Mtr_Export (kWh)'].sum()
-            energy2 = data2['Mtr_Export (kWh)'].sum()
-            
+        energies = [(plant, summaries[plant]['export_total']) for plant in plants]
+        if all(pd.notna(energy) for _, energy in energies):
             response += f"⚡ ENERGY GENERATION\n"
-            response += f"• {plant1}: {energy1:,.0f} kWh\n"
-            response += f"• {plant2}: {energy2:,.0f} kWh\n\n"
+            for plant, energy in energies:
+                response += f"• {plant}: {energy:,.0f} kWh\n"
+            response += "\n"
             
-            # Performance verdict
-            if energy1 > energy2:
-                diff_pct = ((energy1 - energy2) / energy2) * 100
-                response += f"🏆 WINNER: {plant1.upper()}\n"
-                response += f"• Advantage: {diff_pct:.1f}% higher generation\n"
-                response += f"• Difference: {energy1-energy2:,.0f} kWh\n\n"
-            else:
-                diff_pct = ((energy2 - energy1) / energy1) * 100
-                response += f"🏆 WINNER: {plant2.upper()}\n"
-                response += f"• Advantage: {diff_pct:.1f}% higher generation\n"
-                response += f"• Difference: {energy2-energy1:,.0f} kWh\n\n"
+            # Performance verdict against the runner-up; ties go to the later plant
+            winner, top_energy = max(reversed(energies), key=lambda x: x[1])
+            runner_up = max(energy for plant, energy in energies if plant != winner)
+            diff_pct = ((top_energy - runner_up) / runner_up) * 100 if runner_up else float('inf')
+            response += f"🏆 WINNER: {winner.upper()}\n"
+            response += f"• Advantage: {diff_pct:.1f}% higher generation\n"
+            response += f"• Difference: {top_energy-runner_up:,.0f} kWh\n\n"
         
         # Availability comparison
-        if 'PA(%)' in data1.columns and 'PA(%)' in data2.columns:
-            avail1 = data1['PA(%)'].mean()
-            avail2 = data2['PA(%)'].mean()
-            
+        availabilities = [(plant, summaries[plant]['availability_mean']) for plant in plants]
+        if all(pd.notna(avail) for _, avail in availabilities):
             response += f"📊 AVAILABILITY COMPARISON\n"
-            response += f"• {plant1}: {avail1:.2f}%\n"
-            response += f"• {plant2}: {avail2:.2f}%\n"
+            for plant, avail in availabilities:
+                response += f"• {plant}: {avail:.2f}%\n"
             
-            if abs(avail1 - avail2) > 1:
-                better_plant = plant1 if avail1 > avail2 else plant2
-                response += f"• Better Availability: {better_plant.upper()}\n"
+            best_plant, best_avail = max(reversed(availabilities), key=lambda x: x[1])
+            worst_avail = min(avail for _, avail in availabilities)
+            if best_avail - worst_avail > 1:
+                label = "Better Availability" if len(plants) == 2 else "Best Availability"
+                response += f"• {label}: {best_plant.upper()}\n"
             else:
                 response += f"• Status: Comparable performance\n"
         
         return response
     
-    def _create_date_analysis(self, query: str, original_query: str) -> str:
+    def _create_date_analysis(self, query: str, original_query: str, date_range: Optional[DateRange] = None) -> str:
         """Create clean date analysis"""
         
-        target_date = self._extract_date_from_query(query)
+        date_range = date_range or self._extract_date_range_from_query(query)
         
-        if not target_date:
+        if not date_range:
             return """💡 Please specify a valid date for analysis.
 
-Examples: 'June 12', 'yesterday', 'today'"""
+Examples: 'June 12', 'yesterday', 'last 7 days', 'Q2 2025', 'from June 1 to June 15'"""
+        
+        start, end = date_range.start, date_range.end
+        
+        if start == end:
+            response = f"📅 DAILY GENERATION REPORT\n"
+            response += f"{start.strftime('%A, %B %d, %Y')}\n"
+            period = start.strftime('%B %d, %Y')
+        else:
+            response = f"📅 GENERATION REPORT\n"
+            response += f"{start.strftime('%B %d, %Y')} - {end.strftime('%B %d, %Y')} ({(end - start).days + 1} days)\n"
+            period = f"{start.strftime('%B %d, %Y')} - {end.strftime('%B %d, %Y')}"
+        
+        period_totals = self._shared(('period', start, end))
+        if period_totals is None:
+            period_totals = self._period_totals(start, end)
         
-        response = f"📅 DAILY GENERATION REPORT\n"
-        response += f"{target_date.strftime('%A, %B %d, %Y')}\n"
         response += "═" * 50 + "\n\n"
         
         total_energy = 0
         plant_data_list = []
         
-        for plant in self.data_processor.get_available_plants():
-            plant_data = self.data_processor.get_plant_data(plant)
-            
-            if plant_data is not None and not plant_data.empty and 'Date' in plant_data.columns:
-                day_data = plant_data[plant_data['Date'].dt.date == target_date]
-                
-                if not day_data.empty and 'Mtr_Export (kWh)' in day_data.columns:
-                    day_energy = day_data['Mtr_Export (kWh)'].sum()
-                    if pd.notna(day_energy) and day_energy > 0:
-                        total_energy += day_energy
-                        plant_data_list.append((plant, day_energy))
+        for plant, period_energy in period_totals.items():
+            if pd.notna(period_energy) and period_energy > 0:
+                total_energy += period_energy
+                plant_data_list.append((plant, period_energy))
         
         if not plant_data_list:
-            return f"""❌ No generation data available for {target_date.strftime('%B %d, %Y')}.
+            return f"""❌ No generation data available for {period}.
 
 This date may be outside the available data range."""
         
@@ -356,70 +570,57 @@ This date may be outside the available data range."""
         
         return response
     
-    def _extract_date_from_query(self, query: str) -> Optional[datetime.date]:
-        """Extract date from query"""
+    def _extract_date_range_from_query(self, query: str) -> Optional[DateRange]:
+        """Extract a date or date range; dates without a year resolve against the latest data"""
         today = datetime.now().date()
-        
-        if 'yesterday' in query:
-            return today - timedelta(days=1)
-        elif 'today' in query:
-            return today
-        elif 'june 12' in query or '12th june' in query or '12 june' in query:
-            return datetime(2025, 6, 12).date()
-        elif 'june 11' in query or '11th june' in query or '11 june' in query:
-            return datetime(2025, 6, 11).date()
-        elif 'june 6' in query or '6th june' in query or '6 june' in query:
-            return datetime(2025, 6, 6).date()
-        
-        return None
+        anchor = today
+        if self.data_processor is not None:
+            # Rows past the last reading (blank forecast rows) must not move the anchor
+            last_day = self.data_processor.get_cube().last_reading_day()
+            if last_day is not None:
+                anchor = min(pd.Timestamp(last_day).date(), today)
+        
+        return parse_date_range(query, today, anchor)
     
-    def _create_ranking_analysis(self, query: str, original_query: str) -> str:
+    def _create_ranking_analysis(self, query: str, original_query: str, ranking: Optional[str] = None) -> str:
         """Create clean ranking analysis"""
+        return ''.join(self._stream_ranking_analysis(query, original_query, ranking))
+    
+    def _stream_ranking_analysis(self, query: str, original_query: str, ranking: Optional[str] = None) -> Iterator[str]:
+        # Determine ranking type
+        if ranking is None:
+            ranking = ranking_direction(self.intent_engine.keyword_groups(query))
+        if ranking == 'top':
+            header = "🏆 TOP PERFORMING PLANTS\n"
+        elif ranking == 'bottom':
+            header = "⚠️ UNDERPERFORMING PLANTS\n"
+        else:
+            header = "📊 COMPLETE PLANT RANKING\n"
         
-        plant_rankings = []
-        
-        for plant in self.data_processor.get_available_plants():
-            plant_data = self.data_processor.get_plant_data(plant)
-            if plant_data is not None and not plant_data.empty and 'Mtr_Export (kWh)' in plant_data.columns:
-                total_energy = plant_data['Mtr_Export (kWh)'].sum()
-                if pd.notna(total_energy):
-                    plant_rankings.append((plant, total_energy))
+        yield header + "═" * 50 + "\n\n"
         
+        plant_rankings = self._plant_energy_totals()
         plant_rankings.sort(key=lambda x: x[1], reverse=True)
         
-        # Determine ranking type
-        if 'best' in query or 'top' in query or 'most' in query or 'highest' in query:
-            response = "🏆 TOP PERFORMING PLANTS\n"
+        if ranking == 'top':
             plants_to_show = plant_rankings[:8]
-        elif 'worst' in query or 'bottom' in query or 'least' in query or 'lowest' in query:
-            response = "⚠️ UNDERPERFORMING PLANTS\n"
+        elif ranking == 'bottom':
             plants_to_show = plant_rankings[-8:]
         else:
-            response = "📊 COMPLETE PLANT RANKING\n"
             plants_to_show = plant_rankings
         
-        response += "═" * 50 + "\n\n"
-        
-        # Create clean ranking
-        for i, (plant, energy) in enumerate(plants_to_show, 1):
-            response += f"{i}. {plant}: {energy:,.0f} kWh\n"
-        
-        return response
+        # Create clean ranking, flushed in blocks of lines
+        lines = [f"{i}. {plant}: {energy:,.0f} kWh\n" for i, (plant, energy) in enumerate(plants_to_show, 1)]
+        for start in range(0, len(lines), STREAM_BLOCK_LINES):
+            yield ''.join(lines[start:start + STREAM_BLOCK_LINES])
     
     def _create_energy_analysis(self, plants: List[str], original_query: str) -> str:
         """Create clean energy analysis"""
         
         if plants:
-            total_energy = 0
-            plant_energies = []
-            
-            for plant in plants:
-                plant_data = self.data_processor.get_plant_data(plant)
-                if plant_data is not None and not plant_data.empty and 'Mtr_Export (kWh)' in plant_data.columns:
-                    energy = plant_data['Mtr_Export (kWh)'].sum()
-                    if pd.notna(energy):
-                        total_energy += energy
-                        plant_energies.append((plant, energy))
+            totals = dict(self._plant_energy_totals())
+            plant_energies = [(plant, totals[plant]) for plant in plants if plant in totals]
+            total_energy = sum(energy for _, energy in plant_energies)
             
             response = f"⚡ ENERGY GENERATION ANALYSIS\n"
             response += "═" * 50 + "\n\n"
@@ -439,59 +640,76 @@ This date may be outside the available data range."""
     
     def _create_portfolio_analysis(self, original_query: str) -> str:
         """Create clean portfolio overview"""
+        return ''.join(self._stream_portfolio_analysis(original_query))
+    
+    def _stream_portfolio_analysis(self, original_query: str) -> Iterator[str]:
+        yield f"🏭 PORTFOLIO OVERVIEW\n" + "═" * 50 + "\n\n"
         
-        total_energy = 0
-        plant_count = 0
-        plant_energies = []
-        
-        for plant in self.data_processor.get_available_plants():
-            plant_data = self.data_processor.get_plant_data(plant)
-            if plant_data is not None and not plant_data.empty:
-                plant_count += 1
-                if 'Mtr_Export (kWh)' in plant_data.columns:
-                    energy = plant_data['Mtr_Export (kWh)'].sum()
-                    if pd.notna(energy):
-                        total_energy += energy
-                        plant_energies.append((plant, energy))
+        plant_energies = self._plant_energy_totals()
+        plant_count = len(plant_energies)
+        total_energy = sum(energy for _, energy in plant_energies)
         
         plant_energies.sort(key=lambda x: x[1], reverse=True)
         
-        response = f"🏭 PORTFOLIO OVERVIEW\n"
-        response += "═" * 50 + "\n\n"
-        
         # Executive summary
-        response += f"📊 EXECUTIVE SUMMARY\n"
+        response = f"📊 EXECUTIVE SUMMARY\n"
         response += f"• Total Plants: {plant_count}\n"
         response += f"• Total Generation: {total_energy:,.0f} kWh\n"
         
-        if plant_energies:
-            avg_energy = total_energy / len(plant_energies)
-            response += f"• Average per Plant: {avg_energy:,.0f} kWh\n\n"
-            
-            # Top performers
-            response += f"🏆 TOP CONTRIBUTORS\n"
-            for i, (plant, energy) in enumerate(plant_energies[:8], 1):
-                percentage = (energy / total_energy) * 100
-                response += f"{i}. {plant}: {energy:,.0f} kWh ({percentage:.1f}%)\n"
-            
-            # Performance distribution
-            response += f"\n📈 PERFORMANCE DISTRIBUTION\n"
-            
-            q1_threshold = avg_energy * 0.5
-            q2_threshold = avg_energy * 0.8
-            q3_threshold = avg_energy * 1.2
-            
-            q1_count = sum(1 for _, energy in plant_energies if energy <= q1_threshold)
-            q2_count = sum(1 for _, energy in plant_energies if q1_threshold < energy <= q2_threshold)
-            q3_count = sum(1 for _, energy in plant_energies if q2_threshold < energy <= q3_threshold)
-            q4_count = sum(1 for _, energy in plant_energies if energy > q3_threshold)
-            
-            response += f"• High Performers: {q4_count} plants\n"
-            response += f"• Above Average: {q3_count} plants\n"
-            response += f"• Below Average: {q2_count} plants\n"
-            response += f"• Low Performers: {q1_count} plants\n"
+        if not plant_energies:
+            yield response
+            return
         
-        return response
+        avg_energy = total_energy / len(plant_energies)
+        response += f"• Average per Plant: {avg_energy:,.0f} kWh\n\n"
+        yield response
+        
+        # Top performers
+        response = f"🏆 TOP CONTRIBUTORS\n"
+        for i, (plant, energy) in enumerate(plant_energies[:8], 1):
+            percentage = (energy / total_energy) * 100
+            response += f"{i}. {plant}: {energy:,.0f} kWh ({percentage:.1f}%)\n"
+        yield response
+        
+        # Performance distribution
+        response = f"\n📈 PERFORMANCE DISTRIBUTION\n"
+        
+        q1_threshold = avg_energy * 0.5
+        q2_threshold = avg_energy * 0.8
+        q3_threshold = avg_energy * 1.2
+        
+        q1_count = sum(1 for _, energy in plant_energies if energy <= q1_threshold)
+        q2_count = sum(1 for _, energy in plant_energies if q1_threshold < energy <= q2_threshold)
+        q3_count = sum(1 for _, energy in plant_energies if q2_threshold < energy <= q3_threshold)
+        q4_count = sum(1 for _, energy in plant_energies if energy > q3_threshold)
+        
+        response += f"• High Performers: {q4_count} plants\n"
+        response += f"• Above Average: {q3_count} plants\n"
+        response += f"• Below Average: {q2_count} plants\n"
+        response += f"• Low Performers: {q1_count} plants\n"
+        yield response
+    
+    def _period_totals(self, start, end) -> Dict[str, float]:
+        """plant -> export over [start, end] for plants with readings in it"""
+        if start == end:
+            # One lookup in the plant x day cube instead of scanning every plant
+            return self.data_processor.get_day_totals(start)
+        
+        # Prefix-sum lookups: the cost does not grow with the length of the range
+        counts = self.data_processor.range_count(start, end)
+        sums = self.data_processor.range_sum(start, end)
+        return {plant: sums[plant] for plant, count in counts.items() if count > 0}
+    
+    def _plant_energy_totals(self) -> List[tuple]:
+        """(plant, total export) for every plant with data, read from the materialized summaries"""
+        shared = self._shared('energy_totals')
+        if shared is not None:
+            # Callers sort the list in place
+            return list(shared)
+        
+        summaries = self.data_processor.get_plant_summaries()
+        return [(plant, summary['export_total']) for plant, summary in summaries.items()
+                if pd.notna(summary['export_total'])]
     
     def _classify_plant_type(self, plant_name: str, data: pd.DataFrame) -> str:
         """Classify plant type"""
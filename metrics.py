@@ -0,0 +1,228 @@
+"""
+Metrics - in-process latency histograms exposed in the Prometheus text format
+
+Recording an observation is a bisect and two increments under a lock; the
+text exposition is only built when /metrics is scraped. Set METRICS_ENABLED=0
+to turn recording off entirely.
+
+With several worker processes, set METRICS_DIR to a directory they share
+(gunicorn.conf.py does): each process then flushes its series there about once
+a second from a background thread, and a scrape of any worker sums the files
+of all of them, so counters stay monotonic whichever worker answers.
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') != '0'
+
+# Shared by all worker processes; None keeps the series of this process only
+METRICS_DIR = os.environ.get('METRICS_DIR') or None
+
+# Seconds between flushes of this process's series to METRICS_DIR
+FLUSH_INTERVAL = 1.0
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Upper bounds in seconds, from sub-millisecond lookups to a cold workbook load
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_REGISTRY: List['Histogram'] = []
+
+
+def plant_count_label(count: int) -> str:
+    """Bounded label for the number of plants a query mentions"""
+    return str(count) if count < 3 else '3+'
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_float(value: float) -> str:
+    return repr(float(value))
+
+
+class Histogram:
+    """Cumulative-bucket histogram with a fixed label set, values passed positionally"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> per-bucket counts (last one is +Inf, not cumulative) followed by the sum
+        self._series: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+        _REGISTRY.append(self)
+
+    def observe(self, seconds: float, *labels: str):
+        if not METRICS_ENABLED:
+            return
+        # Buckets are inclusive upper bounds: le="0.005" counts 0.005 itself
+        position = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[position] += 1
+            series[-1] += seconds
+        if METRICS_DIR is not None:
+            _exporter.touch()
+
+    @contextmanager
+    def time(self, *labels: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def snapshot(self) -> Dict[tuple, list]:
+        with self._lock:
+            return {labels: list(values) for labels, values in self._series.items()}
+
+    def render(self, series: Dict[tuple, list]) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, values in sorted(series.items()):
+            pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, labels)]
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), values):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else _format_float(bound)
+                bucket_labels = ','.join(pairs + [f'le="{le}"'])
+                lines.append(f"{self.name}_bucket{{{bucket_labels}}} {cumulative}")
+            label_text = f"{{{','.join(pairs)}}}" if pairs else ''
+            lines.append(f"{self.name}_sum{label_text} {_format_float(values[-1])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class StageTimer:
+    """Durations of consecutive stages, recorded once the labels they share are known"""
+
+    def __init__(self):
+        self.started = self._last = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self._idle = 0.0
+
+    def lap(self, stage: str):
+        """Time since the previous lap counts towards stage; repeated laps of a stage add up"""
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + now - self._last
+        self._last = now
+
+    def skip(self):
+        """Leave the time since the previous lap out, e.g. while a streaming client reads a chunk"""
+        now = time.perf_counter()
+        self._idle += now - self._last
+        self._last = now
+
+    def record(self, histogram: Histogram, *labels: str):
+        for stage, seconds in self.stages.items():
+            histogram.observe(seconds, stage, *labels)
+        histogram.observe(self._last - self.started - self._idle, 'total', *labels)
+
+
+class _Exporter:
+    """Flushes this process's series to METRICS_DIR from a daemon thread while there is something new"""
+
+    def __init__(self):
+        self._dirty = threading.Event()
+        self._pid = None
+        self._path = None
+
+    def touch(self):
+        self._dirty.set()
+        if self._pid != os.getpid():
+            self._start()
+
+    def _start(self):
+        # Threads do not survive a fork, so every process starts its own flusher
+        self._pid = os.getpid()
+        # Unique per process lifetime: a reused pid must not overwrite a dead worker's counts
+        self._path = os.path.join(METRICS_DIR, f"{self._pid}-{time.time_ns()}.json")
+        threading.Thread(target=self._run, name="metrics-flush", daemon=True).start()
+
+    def _run(self):
+        while True:
+            self._dirty.wait()
+            time.sleep(FLUSH_INTERVAL)
+            self._dirty.clear()
+            self.flush()
+
+    def flush(self):
+        if self._path is None:
+            return
+        payload = {h.name: [[list(labels), values] for labels, values in h.snapshot().items()] for h in _REGISTRY}
+        # The flusher and a scrape may flush at once; each writes its own temporary file
+        tmp = f"{self._path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(payload, f)
+            os.replace(tmp, self._path)
+        except OSError:
+            pass
+
+
+_exporter = _Exporter()
+
+
+def _collect() -> Dict[str, Dict[tuple, list]]:
+    """histogram name -> label values -> bucket counts and sum, summed over every process"""
+    if METRICS_DIR is None:
+        return {h.name: h.snapshot() for h in _REGISTRY}
+
+    _exporter.flush()
+    merged = {h.name: {} for h in _REGISTRY}
+    try:
+        files = [name for name in os.listdir(METRICS_DIR) if name.endswith('.json')]
+    except OSError:
+        files = []
+    for name in files:
+        try:
+            with open(os.path.join(METRICS_DIR, name), 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for metric, entries in payload.items():
+            if metric not in merged:
+                continue
+            for labels, values in entries:
+                total = merged[metric].setdefault(tuple(labels), [0] * (len(values) - 1) + [0.0])
+                if len(total) == len(values):
+                    merged[metric][tuple(labels)] = [a + b for a, b in zip(total, values)]
+    return merged
+
+
+def render_metrics() -> str:
+    """Every registered histogram in the Prometheus text exposition format"""
+    series = _collect()
+    lines = []
+    for histogram in _REGISTRY:
+        lines.extend(histogram.render(series[histogram.name]))
+    return '\n'.join(lines) + '\n'
+
+
+CHAT_STAGE_SECONDS = Histogram(
+    'chat_stage_seconds', 'Time spent in each stage of answering a chat query',
+    ('stage', 'intent', 'plants'))
+
+CHAT_REPORT_SECONDS = Histogram(
+    'chat_report_seconds', 'Time spent aggregating and formatting each report type',
+    ('report', 'intent', 'plants'))
+
+LOAD_PHASE_SECONDS = Histogram(
+    'load_phase_seconds', 'Time spent in each phase of loading the workbooks',
+    ('phase',))
@@ -0,0 +1,221 @@
+"""
+Plant Cache - columnar on-disk cache of cleaned Daily KPI frames
+
+Each plant gets its own folder holding one .npy file per column plus a
+meta.json describing the workbook fingerprint the frame was built from.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict, namedtuple
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever cleaning changes what ends up in a cached frame
+CACHE_FORMAT_VERSION = 5
+
+_HASH_CHUNK = 1 << 20
+
+# What lazy datasets keep per plant instead of the frame itself
+CachedPlant = namedtuple('CachedPlant', ['plant', 'fingerprint', 'rows', 'start', 'end'])
+
+
+def file_fingerprint(file_path: str) -> Dict:
+    """Path, size, mtime and content hash of a workbook"""
+    stat = os.stat(file_path)
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b''):
+            digest.update(chunk)
+
+    return {
+        'path': os.path.abspath(file_path),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': digest.hexdigest()
+    }
+
+
+def _plant_dir(cache_folder: str, plant_name: str) -> str:
+    return os.path.join(cache_folder, plant_name)
+
+
+def _read_meta(plant_dir: str) -> Optional[Dict]:
+    try:
+        with open(os.path.join(plant_dir, 'meta.json'), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _matches(meta: Optional[Dict], fingerprint: Dict) -> bool:
+    if not meta or meta.get('format') != CACHE_FORMAT_VERSION:
+        return False
+
+    cached = meta.get('fingerprint', {})
+    return all(cached.get(key) == fingerprint[key] for key in ('path', 'size', 'sha256'))
+
+
+def read_cached_plant(cache_folder: str, plant_name: str, fingerprint: Dict) -> Optional[CachedPlant]:
+    """Metadata of a cached frame built from this exact workbook, without reading any column"""
+    plant_dir = _plant_dir(cache_folder, plant_name)
+    meta = _read_meta(plant_dir)
+    if not _matches(meta, fingerprint):
+        return None
+
+    _refresh_mtime(plant_dir, meta, fingerprint)
+    return CachedPlant(plant_name, meta['fingerprint'], meta.get('rows', 0), meta.get('start'), meta.get('end'))
+
+
+def read_cached_frame(cache_folder: str, plant_name: str, fingerprint: Dict,
+                      columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+    """Return the cached frame if it was built from this exact workbook, else None.
+
+    With columns, only those column files are read.
+    """
+    plant_dir = _plant_dir(cache_folder, plant_name)
+    meta = _read_meta(plant_dir)
+    if not _matches(meta, fingerprint):
+        return None
+
+    wanted = columns
+    try:
+        columns = {}
+        for column in meta['columns']:
+            if wanted is None or column['name'] in wanted:
+                columns[column['name']] = _load_column(plant_dir, column)
+        index = pd.DatetimeIndex(_load_column(plant_dir, meta['index'])) if meta.get('index') else None
+        df = pd.DataFrame(columns, index=index)
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"   Ignoring unreadable cache for {plant_name}: {str(e)}")
+        return None
+
+    _refresh_mtime(plant_dir, meta, fingerprint)
+    return df
+
+
+def _refresh_mtime(plant_dir: str, meta: Dict, fingerprint: Dict):
+    # Same content under a new mtime (e.g. copied or touched): refresh the key
+    if meta['fingerprint'].get('mtime_ns') != fingerprint['mtime_ns']:
+        meta['fingerprint'] = fingerprint
+        try:
+            _write_meta(plant_dir, meta)
+        except OSError:
+            pass
+
+
+def write_cached_frame(cache_folder: str, plant_name: str, fingerprint: Dict, df: pd.DataFrame) -> bool:
+    plant_dir = _plant_dir(cache_folder, plant_name)
+    try:
+        os.makedirs(plant_dir, exist_ok=True)
+
+        # Column files are named after the content hash so a half-written
+        # update never mixes with the files the current meta.json points at
+        prefix = fingerprint['sha256'][:16]
+        columns = [_save_column(plant_dir, f"{prefix}_{i:03d}", df[name], str(name))
+                   for i, name in enumerate(df.columns)]
+        index = None
+        if isinstance(df.index, pd.DatetimeIndex):
+            index = _save_column(plant_dir, f"{prefix}_index", pd.Series(df.index), None)
+
+        dates = df['Date'] if 'Date' in df.columns else None
+        _write_meta(plant_dir, {
+            'format': CACHE_FORMAT_VERSION,
+            'plant': plant_name,
+            'fingerprint': fingerprint,
+            'rows': len(df),
+            'start': dates.min().strftime('%Y-%m-%d') if dates is not None else None,
+            'end': dates.max().strftime('%Y-%m-%d') if dates is not None else None,
+            'columns': columns,
+            'index': index
+        })
+
+        keep = {'meta.json'}
+        for column in columns + ([index] if index else []):
+            keep.update(column['files'])
+        for file in os.listdir(plant_dir):
+            if file not in keep:
+                os.remove(os.path.join(plant_dir, file))
+        return True
+
+    except Exception as e:
+        logger.warning(f"   Could not cache {plant_name}: {str(e)}")
+        return False
+
+
+def _save_column(plant_dir: str, stem: str, series: pd.Series, name: Optional[str]) -> Dict:
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        files = [f"{stem}.npy", f"{stem}_categories.npy"]
+        np.save(os.path.join(plant_dir, files[0]), series.cat.codes.to_numpy())
+        np.save(os.path.join(plant_dir, files[1]), series.cat.categories.to_numpy(dtype=object), allow_pickle=True)
+        return {'name': name, 'kind': 'category', 'files': files}
+
+    if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_any_dtype(series):
+        kind, values = 'array', series.to_numpy()
+    else:
+        kind, values = 'object', series.to_numpy(dtype=object)
+
+    files = [f"{stem}.npy"]
+    np.save(os.path.join(plant_dir, files[0]), values, allow_pickle=kind == 'object')
+    return {'name': name, 'kind': kind, 'files': files}
+
+
+def _load_column(plant_dir: str, column: Dict):
+    paths = [os.path.join(plant_dir, file) for file in column['files']]
+    if column['kind'] == 'category':
+        categories = np.load(paths[1], allow_pickle=True)
+        return pd.Categorical.from_codes(np.load(paths[0]), categories=categories)
+
+    return np.load(paths[0], allow_pickle=column['kind'] == 'object')
+
+
+def _write_meta(plant_dir: str, meta: Dict):
+    tmp_path = os.path.join(plant_dir, 'meta.json.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, os.path.join(plant_dir, 'meta.json'))
+
+
+class FrameLRU:
+    """Least-recently-used plant frames, bounded by their deep memory size in bytes"""
+
+    def __init__(self, budget_bytes: int):
+        self.budget_bytes = budget_bytes
+        self.resident_bytes = 0
+        self._frames = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, load: Callable[[], Optional[pd.DataFrame]]) -> Optional[pd.DataFrame]:
+        with self._lock:
+            if key in self._frames:
+                self._frames.move_to_end(key)
+                return self._frames[key][0]
+
+        # Load outside the lock so one slow plant does not block lookups of others
+        df = load()
+        if df is not None:
+            self.put(key, df)
+        return df
+
+    def put(self, key, df: pd.DataFrame):
+        size = int(df.memory_usage(deep=True).sum())
+        with self._lock:
+            if key in self._frames:
+                self.resident_bytes -= self._frames.pop(key)[1]
+            self._frames[key] = (df, size)
+            self.resident_bytes += size
+
+            # Always keep the newest frame, even if it alone exceeds the budget
+            while self.resident_bytes > self.budget_bytes and len(self._frames) > 1:
+                _, (_, evicted_size) = self._frames.popitem(last=False)
+                self.resident_bytes -= evicted_size
+
+    def __len__(self):
+        return len(self._frames)
@@ -0,0 +1,69 @@
+"""
+Response Cache - formatted chatbot answers keyed on the normalized query
+
+Entries are tagged with the dataset version they were rendered from, so a
+reload invalidates them; answers about "today", "last 7 days" and the like
+also expire after a TTL and at midnight, when the day they refer to changes.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Hashable, Optional
+
+class ResponseCache:
+    """Bounded LRU of rendered responses with hit/miss counters"""
+
+    def __init__(self, max_entries: int = 512, relative_ttl: float = 300):
+        self.max_entries = max_entries
+        self.relative_ttl = relative_ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, version: int) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry_version, expires_at, response = entry
+                if entry_version == version and (expires_at is None or time.time() < expires_at):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return response
+                del self._entries[key]
+
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, version: int, response: str, time_relative: bool = False):
+        expires_at = None
+        if time_relative:
+            now = datetime.now()
+            midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+            expires_at = min(now.timestamp() + self.relative_ttl, midnight.timestamp())
+
+        with self._lock:
+            self._entries[key] = (version, expires_at, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+    def __len__(self):
+        return len(self._entries)
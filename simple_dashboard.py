@@ -1,279 +1,71 @@
-from flask import Flask, render_template_string, request, jsonify
+from flask import Flask, Response, abort, render_template_string, request, jsonify
+import json
 import sys
 import os
+import threading
 
 # Add current directory to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from kpi_api import create_kpi_api
 from main_ai_system import MainAISystem
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, render_metrics
+from web_assets import AssetBundle, asset_response, compress_response, make_asset
 
-app = Flask(__name__)
+# Static files are served by static_asset under content-hash URLs instead
+app = Flask(__name__, static_folder=None)
+app.after_request(compress_response)
+assets = AssetBundle(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static'))
 
 # Initialize AI system
 ai_system = None
 
-def initialize_ai():
+# Upper bound on queries per /chat/batch request
+MAX_BATCH_QUERIES = int(os.environ.get('MAX_BATCH_QUERIES', 200))
+
+def initialize_ai(hot_reload=True):
+    global ai_system
+    ai_system = MainAISystem()
+    return initialize_ai_system(ai_system, hot_reload)
+
+def initialize_ai_in_background():
+    """Load on a daemon thread so the port binds (and health checks pass) right away"""
     global ai_system
+    ai_system = MainAISystem()
+    
+    def load():
+        if initialize_ai_system(ai_system):
+            print("✅ AI system initialized successfully!")
+        else:
+            print("❌ Failed to initialize AI system!")
+    
+    threading.Thread(target=load, name="initial-load", daemon=True).start()
+
+def initialize_ai_system(system, hot_reload=True):
     try:
-        ai_system = MainAISystem()
-        success = ai_system.initialize_system()
+        success = system.initialize_system()
+        if success and hot_reload:
+            start_hot_reload()
         return success
     except Exception as e:
         print(f"AI initialization error: {e}")
         return False
 
-@app.route('/')
-def dashboard():
-    html_template = """
+def start_hot_reload():
+    # Poll for workbook changes every RELOAD_INTERVAL seconds; 0 disables hot reload
+    reload_interval = float(os.environ.get('RELOAD_INTERVAL', 60))
+    if ai_system and reload_interval > 0:
+        ai_system.start_hot_reload(reload_interval)
+
+# Dashboard shell; styles and script are content-hashed static assets
+DASHBOARD_HTML = """
     <!DOCTYPE html>
     <html>
     <head>
         <title>⚡ Power Plant AI Dashboard</title>
         <meta charset="UTF-8">
         <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <style>
-            * {
-                margin: 0;
-                padding: 0;
-                box-sizing: border-box;
-            }
-            
-            body {
-                font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                min-height: 100vh;
-                padding: 20px;
-            }
-            
-            .container {
-                max-width: 1000px;
-                margin: 0 auto;
-                background: rgba(255, 255, 255, 0.95);
-                border-radius: 20px;
-                box-shadow: 0 20px 40px rgba(0, 0, 0, 0.1);
-                backdrop-filter: blur(10px);
-                overflow: hidden;
-            }
-            
-            .header {
-                background: linear-gradient(135deg, #4CAF50 0%, #45a049 100%);
-                color: white;
-                padding: 30px;
-                text-align: center;
-                position: relative;
-                overflow: hidden;
-            }
-            
-            .header::before {
-                content: '';
-                position: absolute;
-                top: -50%;
-                left: -50%;
-                width: 200%;
-                height: 200%;
-                background: radial-gradient(circle, rgba(255,255,255,0.1) 0%, transparent 70%);
-                animation: shimmer 3s ease-in-out infinite;
-            }
-            
-            @keyframes shimmer {
-                0%, 100% { transform: rotate(0deg); }
-                50% { transform: rotate(180deg); }
-            }
-            
-            .header h1 {
-                font-size: 2.5em;
-                margin-bottom: 10px;
-                position: relative;
-                z-index: 1;
-            }
-            
-            .header p {
-                font-size: 1.2em;
-                opacity: 0.9;
-                position: relative;
-                z-index: 1;
-            }
-            
-            .chat-area {
-                padding: 30px;
-                display: flex;
-                flex-direction: column;
-                height: 600px;
-            }
-            
-            .chat-container {
-                flex: 1;
-                border: none;
-                background: #f8f9fa;
-                border-radius: 15px;
-                padding: 20px;
-                margin-bottom: 20px;
-                overflow-y: auto;
-                box-shadow: inset 0 2px 10px rgba(0, 0, 0, 0.05);
-            }
-            
-            .chat-container::-webkit-scrollbar {
-                width: 8px;
-            }
-            
-            .chat-container::-webkit-scrollbar-track {
-                background: #f1f1f1;
-                border-radius: 10px;
-            }
-            
-            .chat-container::-webkit-scrollbar-thumb {
-                background: #c1c1c1;
-                border-radius: 10px;
-            }
-            
-            .chat-container::-webkit-scrollbar-thumb:hover {
-                background: #a8a8a8;
-            }
-            
-            .message {
-                margin: 15px 0;
-                padding: 15px 20px;
-                border-radius: 15px;
-                max-width: 80%;
-                word-wrap: break-word;
-                animation: slideIn 0.3s ease-out;
-            }
-            
-            @keyframes slideIn {
-                from { opacity: 0; transform: translateY(20px); }
-                to { opacity: 1; transform: translateY(0); }
-            }
-            
-            .user-message {
-                background: linear-gradient(135deg, #007bff 0%, #0056b3 100%);
-                color: white;
-                margin-left: auto;
-                border-bottom-right-radius: 5px;
-                box-shadow: 0 4px 15px rgba(0, 123, 255, 0.3);
-            }
-            
-            .ai-message {
-                background: linear-gradient(135deg, #28a745 0%, #20c997 100%);
-                color: white;
-                margin-right: auto;
-                border-bottom-left-radius: 5px;
-                box-shadow: 0 4px 15px rgba(40, 167, 69, 0.3);
-                font-family: 'Courier New', monospace;
-                white-space: pre-wrap;
-                line-height: 1.4;
-            }
-            
-            .input-container {
-                display: flex;
-                gap: 15px;
-                align-items: center;
-            }
-            
-            .input-wrapper {
-                flex: 1;
-                position: relative;
-            }
-            
-            input[type="text"] {
-                width: 100%;
-                padding: 15px 20px;
-                border: 2px solid #e9ecef;
-                border-radius: 25px;
-                font-size: 16px;
-                outline: none;
-                transition: all 0.3s ease;
-                background: white;
-            }
-            
-            input[type="text"]:focus {
-                border-color: #007bff;
-                box-shadow: 0 0 0 3px rgba(0, 123, 255, 0.1);
-                transform: translateY(-2px);
-            }
-            
-            .send-button {
-                padding: 15px 30px;
-                background: linear-gradient(135deg, #007bff 0%, #0056b3 100%);
-                color: white;
-                border: none;
-                border-radius: 25px;
-                cursor: pointer;
-                font-size: 16px;
-                font-weight: 600;
-                transition: all 0.3s ease;
-                box-shadow: 0 4px 15px rgba(0, 123, 255, 0.3);
-            }
-            
-            .send-button:hover {
-                transform: translateY(-2px);
-                box-shadow: 0 6px 20px rgba(0, 123, 255, 0.4);
-            }
-            
-            .send-button:active {
-                transform: translateY(0);
-            }
-            
-            .loading {
-                background: linear-gradient(135deg, #ffc107 0%, #ff8f00 100%);
-                animation: pulse 1.5s ease-in-out infinite;
-            }
-            
-            @keyframes pulse {
-                0%, 100% { opacity: 1; }
-                50% { opacity: 0.7; }
-            }
-            
-            .suggestions {
-                display: flex;
-                flex-wrap: wrap;
-                gap: 10px;
-                margin-bottom: 20px;
-            }
-            
-            .suggestion-chip {
-                background: rgba(0, 123, 255, 0.1);
-                color: #007bff;
-                padding: 8px 16px;
-                border-radius: 20px;
-                cursor: pointer;
-                font-size: 14px;
-                transition: all 0.3s ease;
-                border: 1px solid rgba(0, 123, 255, 0.2);
-            }
-            
-            .suggestion-chip:hover {
-                background: #007bff;
-                color: white;
-                transform: translateY(-1px);
-            }
-            
-            .welcome-message {
-                text-align: center;
-                color: #6c757d;
-                font-style: italic;
-                margin: 20px 0;
-            }
-            
-            @media (max-width: 768px) {
-                .container {
-                    margin: 10px;
-                    border-radius: 15px;
-                }
-                
-                .header h1 {
-                    font-size: 2em;
-                }
-                
-                .chat-area {
-                    padding: 20px;
-                    height: 500px;
-                }
-                
-                .message {
-                    max-width: 90%;
-                }
-            }
-        </style>
+        <link rel="stylesheet" href="{{ assets.url('dashboard.css') }}">
     </head>
     <body>
         <div class="container">
@@ -305,74 +97,73 @@ def dashboard():
             </div>
         </div>
         
-        <script>
-            function handleKeyPress(event) {
-                if (event.key === 'Enter') {
-                    sendMessage();
-                }
-            }
-            
-            function sendSuggestion(message) {
-                document.getElementById('user-input').value = message;
-                sendMessage();
-            }
-            
-            function sendMessage() {
-                const input = document.getElementById('user-input');
-                const message = input.value.trim();
-                if (!message) return;
-                
-                const chatContainer = document.getElementById('chat-container');
-                
-                // Hide suggestions after first message
-                const suggestions = document.querySelector('.suggestions');
-                if (suggestions) {
-                    suggestions.style.display = 'none';
-                }
-                
-                // Add user message
-                const userDiv = document.createElement('div');
-                userDiv.className = 'message user-message';
-                userDiv.textContent = message;
-                chatContainer.appendChild(userDiv);
-                
-                // Clear input
-                input.value = '';
-                
-                // Add loading message
-                const loadingDiv = document.createElement('div');
-                loadingDiv.className = 'message ai-message loading';
-                loadingDiv.textContent = '🤖 Analyzing your request...';
-                chatContainer.appendChild(loadingDiv);
-                
-                // Scroll to bottom
-                chatContainer.scrollTop = chatContainer.scrollHeight;
-                
-                // Send to AI
-                fetch('/chat', {
-                    method: 'POST',
-                    headers: {'Content-Type': 'application/json'},
-                    body: JSON.stringify({message: message})
-                })
-                .then(response => response.json())
-                .then(data => {
-                    loadingDiv.className = 'message ai-message';
-                    loadingDiv.textContent = data.response;
-                    chatContainer.scrollTop = chatContainer.scrollHeight;
-                })
-                .catch(error => {
-                    loadingDiv.className = 'message ai-message';
-                    loadingDiv.textContent = '❌ Error: ' + error.message;
-                });
-            }
-            
-            // Auto-focus input
-            document.getElementById('user-input').focus();
-        </script>
+        
+        <script src="{{ assets.url('dashboard.js') }}"></script>
     </body>
     </html>
     """
-    return html_template
+
+# Rendered and compressed on first request, then served from memory
+dashboard_page = None
+
+@app.route('/')
+def dashboard():
+    global dashboard_page
+    if dashboard_page is None:
+        html = render_template_string(DASHBOARD_HTML, assets=assets)
+        dashboard_page = make_asset('/', html.encode('utf-8'), 'text/html')
+    # The shell revalidates so new asset URLs are picked up after a deploy
+    return asset_response(dashboard_page, 'no-cache')
+
+@app.route('/static/<path:filename>')
+def static_asset(filename):
+    asset = assets.get(filename)
+    if asset is None:
+        abort(404)
+    return asset_response(asset)
+
+def load_status():
+    if ai_system is None:
+        return {'state': 'starting', 'loaded': 0, 'total': 0, 'elapsed_seconds': 0.0, 'ready': False}
+    status = ai_system.load_progress()
+    status['ready'] = ai_system.is_initialized
+    return status
+
+def loaded_processor():
+    return ai_system.data_processor if ai_system and ai_system.is_initialized else None
+
+app.register_blueprint(create_kpi_api(loaded_processor, load_status))
+
+@app.route('/healthz')
+def healthz():
+    # Liveness only: the process is up and serving requests
+    return jsonify({'status': 'ok'})
+
+@app.route('/readyz')
+def readyz():
+    status = load_status()
+    return jsonify(status), 200 if status['ready'] else 503
+
+@app.route('/metrics')
+def metrics():
+    # Latency histograms in the Prometheus text format, summed over workers when METRICS_DIR is set
+    return Response(render_metrics(), content_type=METRICS_CONTENT_TYPE)
+
+def not_ready_response():
+    """Warming-up or not-initialized reply while the dataset is unavailable, else None"""
+    if ai_system and ai_system.is_initialized:
+        return None
+    
+    status = load_status()
+    if status['state'] in ('starting', 'loading'):
+        response = jsonify({
+            'response': f"⏳ Warming up: loaded {status['loaded']} of {status['total'] or '?'} plant files "
+                        f"({status['elapsed_seconds']:.0f}s so far). Please try again in a moment.",
+            'ready': False
+        })
+        response.headers['Retry-After'] = '5'
+        return response, 503
+    return jsonify({'response': '❌ AI system not initialized. Please restart the server.'}), 503
 
 @app.route('/chat', methods=['POST'])
 def chat():
@@ -381,8 +172,9 @@ def chat():
     data = request.get_json()
     user_message = data.get('message', '')
     
-    if not ai_system:
-        return jsonify({'response': '❌ AI system not initialized. Please restart the server.'})
+    not_ready = not_ready_response()
+    if not_ready:
+        return not_ready
     
     try:
         response = ai_system.process_query(user_message)
@@ -390,6 +182,43 @@ def chat():
     except Exception as e:
         return jsonify({'response': f'❌ Error processing query: {str(e)}'})
 
+@app.route('/chat/batch', methods=['POST'])
+def chat_batch():
+    """Answer {"messages": [...]} in one call; responses come back in the same order"""
+    data = request.get_json(silent=True) or {}
+    messages = data.get('messages', [])
+    
+    if not isinstance(messages, list) or not all(isinstance(m, str) for m in messages):
+        return jsonify({'error': 'messages must be a list of strings'}), 400
+    if len(messages) > MAX_BATCH_QUERIES:
+        return jsonify({'error': f'at most {MAX_BATCH_QUERIES} messages per batch'}), 413
+    
+    not_ready = not_ready_response()
+    if not_ready:
+        return not_ready
+    
+    try:
+        return jsonify({'responses': ai_system.process_queries(messages)})
+    except Exception as e:
+        return jsonify({'error': f'Error processing batch: {str(e)}'}), 500
+
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    """Server-Sent Events: one data event per report section, flushed as soon as it is formatted"""
+    data = request.get_json()
+    user_message = data.get('message', '')
+    
+    not_ready = not_ready_response()
+    if not_ready:
+        return not_ready
+    
+    def events():
+        for chunk in ai_system.stream_query(user_message):
+            yield f"data: {json.dumps(chunk)}\n\n"
+    
+    return Response(events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 if __name__ == '__main__':
     import os
     
@@ -398,9 +227,7 @@ if __name__ == '__main__':
     
     print("🚀 Starting Power Plant AI Dashboard for Render...")
     
-    if initialize_ai():
-        print("✅ AI system initialized successfully!")
-        print(f"🌐 Dashboard starting on port {port}")
-        app.run(host='0.0.0.0', port=port, debug=False)
-    else:
-        print("❌ Failed to initialize AI system!")
\ No newline at end of file
+    # Bind first; /readyz reports progress until the data is loaded
+    initialize_ai_in_background()
+    print(f"🌐 Dashboard starting on port {port}")
+    app.run(host='0.0.0.0', port=port, debug=False)
\ No newline at end of file
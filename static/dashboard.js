@@ -0,0 +1,95 @@
+function handleKeyPress(event) {
+    if (event.key === 'Enter') {
+        sendMessage();
+    }
+}
+
+function sendSuggestion(message) {
+    document.getElementById('user-input').value = message;
+    sendMessage();
+}
+
+function sendMessage() {
+    const input = document.getElementById('user-input');
+    const message = input.value.trim();
+    if (!message) return;
+
+    const chatContainer = document.getElementById('chat-container');
+
+    // Hide suggestions after first message
+    const suggestions = document.querySelector('.suggestions');
+    if (suggestions) {
+        suggestions.style.display = 'none';
+    }
+
+    // Add user message
+    const userDiv = document.createElement('div');
+    userDiv.className = 'message user-message';
+    userDiv.textContent = message;
+    chatContainer.appendChild(userDiv);
+
+    // Clear input
+    input.value = '';
+
+    // Add loading message
+    const loadingDiv = document.createElement('div');
+    loadingDiv.className = 'message ai-message loading';
+    loadingDiv.textContent = '🤖 Analyzing your request...';
+    chatContainer.appendChild(loadingDiv);
+
+    // Scroll to bottom
+    chatContainer.scrollTop = chatContainer.scrollHeight;
+
+    // Send to AI, rendering report sections as they stream in
+    fetch('/chat/stream', {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify({message: message})
+    })
+    .then(response => {
+        // Anything but an event stream (warming up, load failed, errors) is a single JSON reply
+        const contentType = response.headers.get('Content-Type') || '';
+        if (!contentType.startsWith('text/event-stream') || !response.body) {
+            return response.json().then(data => {
+                loadingDiv.className = 'message ai-message';
+                loadingDiv.textContent = data.response;
+                chatContainer.scrollTop = chatContainer.scrollHeight;
+            });
+        }
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let started = false;
+
+        function read() {
+            return reader.read().then(({done, value}) => {
+                if (done) return;
+                buffer += decoder.decode(value, {stream: true});
+                const events = buffer.split('\n\n');
+                buffer = events.pop();
+                events.forEach(event => {
+                    event.split('\n').forEach(line => {
+                        if (!line.startsWith('data: ')) return;
+                        if (!started) {
+                            loadingDiv.className = 'message ai-message';
+                            loadingDiv.textContent = '';
+                            started = true;
+                        }
+                        loadingDiv.textContent += JSON.parse(line.slice(6));
+                    });
+                });
+                chatContainer.scrollTop = chatContainer.scrollHeight;
+                return read();
+            });
+        }
+        return read();
+    })
+    .catch(error => {
+        loadingDiv.className = 'message ai-message';
+        loadingDiv.textContent = '❌ Error: ' + error.message;
+    });
+}
+
+// Auto-focus input
+document.getElementById('user-input').focus();
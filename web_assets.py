@@ -0,0 +1,140 @@
+"""
+Web Assets - content-hashed, precompressed static files and negotiated compression
+
+Files under static/ are read once at startup, published under URLs that embed
+a hash of their content (dashboard.<hash>.css) and compressed ahead of time,
+so they can be cached forever and served without per-request work. Dynamic
+JSON/HTML responses are compressed per request for clients that accept it.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+from collections import namedtuple
+from typing import Dict, Optional
+
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+COMPRESSIBLE_TYPES = frozenset(['application/json', 'text/html', 'text/css', 'text/javascript',
+                                'application/javascript', 'text/plain'])
+# Below this, compression costs more than the bytes it saves
+MIN_COMPRESS_BYTES = 1024
+
+# Precompressed representations: encoding -> bytes, always including 'identity'
+Asset = namedtuple('Asset', ['url', 'mimetype', 'etag', 'variants'])
+
+
+def _precompress(data: bytes) -> Dict[str, bytes]:
+    variants = {'identity': data, 'gzip': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['br'] = brotli.compress(data, quality=11)
+    return {encoding: body for encoding, body in variants.items()
+            if encoding == 'identity' or len(body) < len(data)}
+
+
+def negotiate(encodings) -> str:
+    """Best encoding the client accepts out of encodings, preferring brotli"""
+    accepted = request.accept_encodings
+    for encoding in ('br', 'gzip'):
+        if encoding in encodings and accepted[encoding] > 0:
+            return encoding
+    return 'identity'
+
+
+def etag_matches(etag: str, encoding: str = 'identity') -> bool:
+    """If-None-Match check against the tag of the representation this request negotiated"""
+    return request.if_none_match.contains(encoded_etag(etag, encoding))
+
+
+def accepted_encoding() -> str:
+    """Encoding to compress a dynamic response with for this request"""
+    return negotiate(('br', 'gzip') if brotli is not None else ('gzip',))
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    # Strong tags must differ per byte representation
+    return etag if encoding == 'identity' else f"{etag}-{encoding}"
+
+
+def make_asset(url: str, data: bytes, mimetype: str) -> Asset:
+    return Asset(url, mimetype, hashlib.sha256(data).hexdigest()[:32], _precompress(data))
+
+
+def asset_response(asset: Asset, cache_control: str = IMMUTABLE_CACHE) -> Response:
+    encoding = negotiate(asset.variants)
+    if etag_matches(asset.etag, encoding):
+        response = Response(status=304)
+    else:
+        response = Response(asset.variants[encoding], mimetype=asset.mimetype)
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+
+    response.set_etag(encoded_etag(asset.etag, encoding))
+    response.headers['Cache-Control'] = cache_control
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+class AssetBundle:
+    """Every file of a folder, published under content-hash URLs"""
+
+    def __init__(self, folder: str, url_prefix: str = '/static'):
+        self.url_prefix = url_prefix
+        self._assets = {}  # versioned file name -> Asset
+        self._urls = {}  # original file name -> versioned URL
+
+        for name in sorted(os.listdir(folder)):
+            path = os.path.join(folder, name)
+            if not os.path.isfile(path):
+                continue
+            with open(path, 'rb') as f:
+                data = f.read()
+
+            stem, ext = os.path.splitext(name)
+            versioned = f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+            mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+            self._assets[versioned] = make_asset(f"{url_prefix}/{versioned}", data, mimetype)
+            self._urls[name] = f"{url_prefix}/{versioned}"
+
+    def url(self, name: str) -> str:
+        return self._urls[name]
+
+    def get(self, versioned_name: str) -> Optional[Asset]:
+        return self._assets.get(versioned_name)
+
+
+def compress_response(response: Response) -> Response:
+    """after_request hook: compress buffered text responses for clients that accept it"""
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE_TYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    if len(response.get_data()) < MIN_COMPRESS_BYTES:
+        return response
+    return encode_response(response, accepted_encoding())
+
+
+def encode_response(response: Response, encoding: str) -> Response:
+    """Compress a buffered body with encoding and suffix its ETag to match"""
+    response.vary.add('Accept-Encoding')
+    if encoding == 'identity':
+        return response
+
+    # Per-request compression favours speed over ratio
+    data = response.get_data()
+    compressed = brotli.compress(data, quality=5) if encoding == 'br' else gzip.compress(data, compresslevel=6)
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(encoded_etag(etag, encoding), weak)
+    return response
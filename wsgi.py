@@ -0,0 +1,13 @@
+"""
+WSGI entry point for pre-fork servers
+
+Importing this module starts loading the dataset on a background thread, so
+each gunicorn worker accepts requests immediately: /healthz answers at once
+and /readyz turns 200 when the load finishes. Workers starting together load
+one at a time; the first parses the workbooks and publishes the memory-mapped
+snapshot, the others attach it and share its pages.
+"""
+
+from simple_dashboard import app, initialize_ai_in_background
+
+initialize_ai_in_background()